@@ -1,59 +1,1130 @@
 import diffeq.utils.vectors as _ve
+from diffeq.utils.linalg import lu_factor, lu_solve
+from array import array
+from typing import Callable
+import functools
 import random
+import math
 
 
 class integrator:
+    """
+    By default `step` works on named-axis vectors and `dx_dt` is the vector
+    function itself, so `x + dx_dt(x)*self.dt` is a valid step. Integrators
+    with `lists = True` (all the built-in ones) instead work on plain lists of
+    values ordered by a fixed layout and `dx_dt` maps such a list to the list
+    of derivatives.
+    """
+    # steps on layout lists instead of vectors
+    lists = False
+    # integrates a whole structure-of-arrays ensemble in one call (system.run_ensemble), needs `lists`
+    batched = False
+
     def __init__(self, dt, inside_iterations=None):
         self.dt = dt
         self.ii = int(1/dt) if inside_iterations is None else inside_iterations
 
-    def step(self, x, dx_dt):
+    def step(self, x: list, dx_dt) -> list:
         raise NotImplementedError
 
+    def get_stats(self) -> dict:
+        return {}
+
+    def bind(self, ds_dt: _ve.vector_function, axes, dx_dt, parameters=None):
+        """
+        Called by `system` with its vector function, layout axes and compiled
+        `dx_dt`. `parameters` is the parameter-value list of the system, to
+        pass to what the integrator compiles from ds_dt (see `program.compile`).
+        """
+
+    def path(self, j):
+        """Called by `system` before integrating the j-th member of an ensemble."""
+
+    def reset(self):
+        """
+        Forgets what is carried from one step to the next (adapted step size,
+        reused derivatives and Jacobians), called before independent runs
+        (`diffeq.parallel`, `diffeq.sweeps`) so they do not depend on each other.
+        """
+
     def integrate(self, x, dx_dt):
+        if self.lists and isinstance(x, dict):
+            return self.integrate_vector(x, dx_dt)
         for _ in range(self.ii):
             x = self.step(x, dx_dt)
         return x
 
+    def advance(self, x, dx_dt) -> list:
+        """Integrates over one `dt` (adaptive integrators in as many steps as they need)."""
+        return self.step(x, dx_dt)
+
+    def integrate_vector(self, x: _ve.vector, dx_dt) -> _ve.vector:
+        lay = _ve.layout(x.keys())
+        if isinstance(dx_dt, _ve.vector_function):
+            f = dx_dt.compile(lay.axes, lay.axes)
+            self.bind(dx_dt, lay.axes, f)
+        else:
+            f = lambda data: lay.pack(dx_dt(lay.unpack(data)))
+        return lay.unpack(self.integrate(lay.pack(x), f))
+
 
 class euler_integrator(integrator):
+    lists = True
+    batched = True
+
     def step(self, x, dx_dt):
-        return x + dx_dt(x)*self.dt
+        dt = self.dt
+        return [a + dt*k for a, k in zip(x, dx_dt(x))]
+
+
+# generated steps of the Runge–Kutta tableaux, see explicit_rk_integrator
+_rk_steps = {}
+
+
+class explicit_rk_integrator(integrator):
+    """
+    Explicit Runge–Kutta method given by its Butcher tableau: row `a[i]`
+    weights the earlier stages in the input of stage i and `b` the stages in
+    the step. The step is generated once per tableau as straight-line code
+    in which zero coefficients do not appear. Only the stage inputs share a
+    buffer kept by the integrator (dx_dt always gets the same list); every
+    stage derivative `dx_dt` returns and the result of the step are new lists.
+    """
+    lists = True
+    batched = True
+    a = ()
+    b = ()
+
+    def __init__(self, dt, inside_iterations=None):
+        super().__init__(dt, inside_iterations)
+        self.__buffer = []
+        self.__step = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_explicit_rk_integrator__step'] = None
+        return state
+
+    @classmethod
+    def get_step_source(cls) -> str:
+        def combination(row):
+            terms = ''
+            for j, c in enumerate(row):
+                if c != 0:
+                    term = f'p{j}' if abs(c) == 1 else f'{abs(float(c))!r}*p{j}'
+                    terms += (' - ' if c < 0 else ' + ') + term if terms else ('-' if c < 0 else '') + term
+            return terms, [f'p{j}' for j, c in enumerate(row) if c != 0]
+        lines = ['def __step(x, dx_dt, h, y):']
+        for i, row in enumerate(cls.a):
+            terms, used = combination(row)
+            if not terms:
+                lines.append(f'    k{i} = dx_dt(x)')
+                continue
+            ks = ''.join(f', k{p[1:]}' for p in used)
+            lines.append(f'    y[:] = [v + h*({terms}) for v, {", ".join(used)} in zip(x{ks})]')
+            lines.append(f'    k{i} = dx_dt(y)')
+        terms, used = combination(cls.b)
+        ks = ''.join(f', k{p[1:]}' for p in used)
+        lines.append(f'    return [v + h*({terms}) for v, {", ".join(used)} in zip(x{ks})]')
+        return '\n'.join(lines) + '\n'
+
+    @classmethod
+    def get_step(cls):
+        key = (cls.a, cls.b)
+        if key not in _rk_steps:
+            namespace = {}
+            exec(compile(cls.get_step_source(), f'<{cls.__name__} step>', 'exec'), namespace)
+            _rk_steps[key] = namespace['__step']
+        return _rk_steps[key]
+
+    def step(self, x, dx_dt):
+        if self.__step is None or len(self.__buffer) != len(x):
+            self.__buffer = [0.0]*len(x)
+            self.__step = self.get_step()
+        return self.__step(x, dx_dt, self.dt, self.__buffer)
+
 
+class rk4_integrator(explicit_rk_integrator):
+    a = ((), (1/2,), (0, 1/2), (0, 0, 1))
+    b = (1/6, 1/3, 1/3, 1/6)
+
+
+class rk38_integrator(explicit_rk_integrator):
+    """Kutta's 3/8 rule, fourth order."""
+    a = ((), (1/3,), (-1/3, 1), (1, -1, 1))
+    b = (1/8, 3/8, 3/8, 1/8)
+
+
+class rk6_integrator(explicit_rk_integrator):
+    """Butcher's seven stage sixth order method."""
+    a = (
+        (),
+        (1/3,),
+        (0, 2/3),
+        (1/12, 1/3, -1/12),
+        (-1/16, 9/8, -3/16, -3/8),
+        (0, 9/8, -3/8, -3/4, 1/2),
+        (9/44, -9/11, 63/44, 18/11, 0, -16/11),
+    )
+    b = (11/120, 0, 27/40, 27/40, -4/15, -4/15, 11/120)
+
+
+class verner6_integrator(explicit_rk_integrator):
+    """Sixth order solution of Verner's 6(5) pair (DVERK), eight stages."""
+    a = (
+        (),
+        (1/6,),
+        (4/75, 16/75),
+        (5/6, -8/3, 5/2),
+        (-165/64, 55/6, -425/64, 85/96),
+        (12/5, -8, 4015/612, -11/36, 88/255),
+        (-8263/15000, 124/75, -643/680, -81/250, 2484/10625, 0),
+        (3501/1720, -300/43, 297275/52632, -319/2322, 24068/84065, 0, 3850/26703),
+    )
+    b = (3/40, 0, 875/2244, 23/72, 264/1955, 0, 125/11592, 43/616)
+
+
+class dopri5_integrator(integrator):
+    """
+    Dormand–Prince 5(4) with error control.
+
+    `dt*inside_iterations` is the interval between recorded states, inside it
+    the step size is adapted so that the local error stays below
+    `atol + rtol*|x|`. The last stage of an accepted step is the first stage
+    of the next one (FSAL).
+    """
+    lists = True
+    batched = True
+
+    a = (
+        (),
+        (1/5,),
+        (3/40, 9/40),
+        (44/45, -56/15, 32/9),
+        (19372/6561, -25360/2187, 64448/6561, -212/729),
+        (9017/3168, -355/33, 46732/5247, 49/176, -5103/18656),
+        (35/384, 0, 500/1113, 125/192, -2187/6784, 11/84),
+    )
+    e = (71/57600, 0, -71/16695, 71/1920, -17253/339200, 22/525, -1/40)
+
+    def __init__(self, dt, inside_iterations=None, rtol=1e-6, atol=1e-9, h=None):
+        super().__init__(dt, inside_iterations)
+        self.rtol = rtol
+        self.atol = atol
+        self.initial_h = self.h = dt if h is None else h
+        self.accepted = 0
+        self.rejected = 0
+        self.evaluations = 0
+        self.__fsal = (None, None, None)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_dopri5_integrator__fsal'] = (None, None, None)
+        return state
+
+    def reset(self):
+        self.h = self.initial_h
+        self.__fsal = (None, None, None)
+
+    def get_stats(self):
+        return {'accepted': self.accepted, 'rejected': self.rejected, 'evaluations': self.evaluations}
 
-class rk4_integrator(integrator):
     def step(self, x, dx_dt):
-        k1 = dx_dt(x)
-        k2 = dx_dt(x + 0.5 * k1 * self.dt)
-        k3 = dx_dt(x + 0.5 * k2 * self.dt)
-        k4 = dx_dt(x + k3 * self.dt)
-        return x + (k1 + 2*k2 + 2*k3 + k4) * (self.dt / 6)
+        return self.attempt(x, dx_dt, self.dt)[0]
+
+    def attempt(self, x, dx_dt, h):
+        """One Dormand–Prince step of size h: new state, its derivative and the scaled error."""
+        (a2,), (a31, a32), (a41, a42, a43), (a51, a52, a53, a54), \
+            (a61, a62, a63, a64, a65), (b1, _, b3, b4, b5, b6) = self.a[1:]
+        e1, _, e3, e4, e5, e6, e7 = self.e
+        last_x, last_f, k1 = self.__fsal
+        if last_x is not x or last_f is not dx_dt:
+            k1 = dx_dt(x)
+            self.evaluations += 1
+        k2 = dx_dt([v + h*a2*p1 for v, p1 in zip(x, k1)])
+        k3 = dx_dt([v + h*(a31*p1 + a32*p2) for v, p1, p2 in zip(x, k1, k2)])
+        k4 = dx_dt([v + h*(a41*p1 + a42*p2 + a43*p3) for v, p1, p2, p3 in zip(x, k1, k2, k3)])
+        k5 = dx_dt([v + h*(a51*p1 + a52*p2 + a53*p3 + a54*p4)
+                    for v, p1, p2, p3, p4 in zip(x, k1, k2, k3, k4)])
+        k6 = dx_dt([v + h*(a61*p1 + a62*p2 + a63*p3 + a64*p4 + a65*p5)
+                    for v, p1, p2, p3, p4, p5 in zip(x, k1, k2, k3, k4, k5)])
+        y = [v + h*(b1*p1 + b3*p3 + b4*p4 + b5*p5 + b6*p6)
+             for v, p1, p3, p4, p5, p6 in zip(x, k1, k3, k4, k5, k6)]
+        k7 = dx_dt(y)
+        self.evaluations += 6
+        rtol, atol = self.rtol, self.atol
+        err = sum(
+            (h*(e1*p1 + e3*p3 + e4*p4 + e5*p5 + e6*p6 + e7*p7)/(atol + rtol*max(abs(v), abs(w))))**2
+            for v, w, p1, p3, p4, p5, p6, p7 in zip(x, y, k1, k3, k4, k5, k6, k7))
+        err = (err/len(x))**0.5 if x else 0.0
+        self.__fsal = (x, dx_dt, k1)
+        return y, k7, err
+
+    def integrate(self, x, dx_dt):
+        if isinstance(x, dict):
+            return self.integrate_vector(x, dx_dt)
+        return self.adapt(x, dx_dt, self.dt*self.ii)
+
+    def advance(self, x, dx_dt):
+        return self.adapt(x, dx_dt, self.dt)
+
+    def adapt(self, x, dx_dt, t_end):
+        """Integrates over t_end with adaptive steps."""
+        t = 0.0
+        while t_end - t > 1e-12*t_end:
+            h = min(self.h, t_end - t)
+            if h <= 1e-14*t_end:
+                raise RuntimeError(f'step size underflow: {h}')
+            y, k7, err = self.attempt(x, dx_dt, h)
+            factor = 0.9*err**-0.2 if err > 0 else 5.0
+            if err <= 1.0:
+                x = y
+                self.__fsal = (x, dx_dt, k7)
+                t += h
+                self.accepted += 1
+                if h == self.h:
+                    self.h = h*min(5.0, max(0.2, factor))
+            else:
+                self.rejected += 1
+                self.h = h*max(0.2, factor)
+        return x
+
+
+class taylor_integrator(integrator):
+    """
+    Taylor series method of order `order` (10-20 allows large steps) on the
+    coefficient program of `program.taylor`, generated once per vector
+    function when the integrator is bound to it.
+
+    Without `tol` every step has size dt. With `tol` the steps inside every
+    `dt*inside_iterations` interval are chosen from the last two
+    coefficients (Jorba and Zou) so that the truncation error stays near
+    `tol*max(1, |x|)`.
+    """
+    lists = True
+    batched = False
+
+    def __init__(self, dt, inside_iterations=None, order=16, tol=None):
+        super().__init__(dt, inside_iterations)
+        self.order = order
+        self.tol = tol
+        self.steps = 0
+        self.__bound = {}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_taylor_integrator__bound'] = {}
+        return state
+
+    def get_stats(self):
+        return {'steps': self.steps}
+
+    def bind(self, ds_dt, axes, dx_dt, parameters=None):
+        self.__bound[dx_dt] = ds_dt.taylor(axes, parameters=parameters)
+
+    def coefficients(self, x, dx_dt) -> list[list[float]]:
+        if dx_dt not in self.__bound:
+            raise ValueError('taylor_integrator needs the coefficient program of a vector function, '
+                             'integrate through system')
+        return self.__bound[dx_dt](x, self.order)
+
+    @staticmethod
+    def evaluate(c, h) -> list:
+        out = []
+        for series in c:
+            v = 0.0
+            for a in reversed(series):
+                v = v*h + a
+            out.append(v)
+        return out
+
+    def step(self, x, dx_dt):
+        self.steps += 1
+        return self.evaluate(self.coefficients(x, dx_dt), self.dt)
+
+    def step_size(self, x, c) -> float:
+        scale = self.tol*max(1.0, max(map(abs, x), default=0.0))
+        h = math.inf
+        for j in (self.order - 1, self.order):
+            norm = max(abs(series[j]) for series in c)
+            if norm > 0.0:
+                h = min(h, (scale/norm)**(1/j))
+        return h
+
+    def integrate(self, x, dx_dt):
+        if isinstance(x, dict) or self.tol is None:
+            return super().integrate(x, dx_dt)
+        return self.adapt(x, dx_dt, self.dt*self.ii)
+
+    def advance(self, x, dx_dt):
+        if self.tol is None:
+            return self.step(x, dx_dt)
+        return self.adapt(x, dx_dt, self.dt)
+
+    def adapt(self, x, dx_dt, t_end):
+        """Integrates over t_end with steps chosen from the coefficients."""
+        t = 0.0
+        while t_end - t > 1e-12*t_end:
+            c = self.coefficients(x, dx_dt)
+            h = min(self.step_size(x, c), t_end - t)
+            x = self.evaluate(c, h)
+            t += h
+            self.steps += 1
+        return x
+
+
+class symplectic_integrator(integrator):
+    """
+    Splitting method for separable Hamiltonian systems: pairs of a drift
+    (positions advance with their derivatives, which depend on the momenta)
+    and a kick (momenta advance with the forces, which depend on the
+    positions), weighted by the `drift` and `kick` coefficients. Positions
+    and momenta are the axes declared with `vector_function.partition`,
+    other axes stay constant.
+
+    Every evaluation of dx_dt gives velocities and forces at once; only the
+    half invalidated by the last update is recomputed, also across steps.
+    """
+    lists = True
+    batched = False
+    drift = ()
+    kick = ()
+
+    def __init__(self, dt, inside_iterations=None):
+        super().__init__(dt, inside_iterations)
+        self.evaluations = 0
+        self.__bound = {}
+        # (last returned state, dx_dt, its derivatives, velocities valid, forces valid)
+        self.__last = (None, None, None, False, False)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_symplectic_integrator__bound'] = {}
+        state['_symplectic_integrator__last'] = (None, None, None, False, False)
+        return state
+
+    def reset(self):
+        self.__last = (None, None, None, False, False)
+
+    def get_stats(self):
+        return {'evaluations': self.evaluations}
+
+    def bind(self, ds_dt, axes, dx_dt, parameters=None):
+        if not ds_dt.positions:
+            raise ValueError('symplectic integrators need positions and momenta, '
+                             'declare them with vector_function.partition')
+        index = {a: i for i, a in enumerate(axes)}
+        self.__bound[dx_dt] = ([index[a] for a in ds_dt.positions], [index[a] for a in ds_dt.momenta])
+
+    def step(self, x, dx_dt):
+        if dx_dt not in self.__bound:
+            raise ValueError('dx_dt is not bound, integrate a partitioned vector_function through system')
+        positions, momenta = self.__bound[dx_dt]
+        h = self.dt
+        last, last_dx_dt, f, velocities, forces = self.__last
+        if last is not x or last_dx_dt is not dx_dt:
+            velocities = forces = False
+        x = list(x)
+        for c, d in zip(self.drift, self.kick):
+            if c:
+                if not velocities:
+                    f = dx_dt(x)
+                    self.evaluations += 1
+                    velocities = forces = True
+                for i in positions:
+                    x[i] += c*h*f[i]
+                forces = False
+            if d:
+                if not forces:
+                    f = dx_dt(x)
+                    self.evaluations += 1
+                    velocities = forces = True
+                for i in momenta:
+                    x[i] += d*h*f[i]
+                velocities = False
+        self.__last = (x, dx_dt, f, velocities, forces)
+        return x
+
+
+class leapfrog_integrator(symplectic_integrator):
+    """Velocity Verlet (kick-drift-kick leapfrog): second order, two evaluations per step."""
+    drift = (0.0, 1.0)
+    kick = (0.5, 0.5)
+
+
+class yoshida4_integrator(symplectic_integrator):
+    """Yoshida's fourth order composition of three leapfrog steps, six evaluations per step."""
+    _w1 = 1/(2 - 2**(1/3))
+    _w0 = -2**(1/3)*_w1
+    drift = (_w1/2, (_w0 + _w1)/2, (_w0 + _w1)/2, _w1/2)
+    kick = (_w1, _w0, _w1, 0.0)
+
+
+class implicit_integrator(integrator):
+    """
+    Base of the stiff solvers. Steps solve linear systems with the matrix
+    I - c*J, J being the Jacobian of dx_dt: compiled from the symbolic
+    `yacobian` once `system` binds the solver, finite differences otherwise.
+
+    The LU factorisation is kept across steps and Newton iterations. The
+    Jacobian is refreshed when Newton fails with an old one or after
+    `max_age` steps, the matrix is refactored when J or c changes.
+    A step whose Newton iterations fail with a fresh Jacobian is halved.
+    """
+    lists = True
+    batched = False
+
+    def __init__(self, dt, inside_iterations=None, rtol=1e-6, atol=1e-9, max_iterations=8, max_age=20):
+        super().__init__(dt, inside_iterations)
+        self.rtol = rtol
+        self.atol = atol
+        self.max_iterations = max_iterations
+        self.max_age = max_age
+        self.steps = 0
+        self.evaluations = 0
+        self.newton_iterations = 0
+        self.jacobians = 0
+        self.factorizations = 0
+        self.failures = 0
+        self.__bound = {}
+        self.__jacobian = None  # [dx_dt, J, age]
+        self.__lu = None  # (c, factorisation of I - c*J)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_implicit_integrator__bound'] = {}
+        state['_implicit_integrator__jacobian'] = None
+        state['_implicit_integrator__lu'] = None
+        return state
+
+    def reset(self):
+        self.__jacobian = None
+        self.__lu = None
+
+    def get_stats(self):
+        return {'steps': self.steps, 'evaluations': self.evaluations,
+                'newton_iterations': self.newton_iterations, 'jacobians': self.jacobians,
+                'factorizations': self.factorizations, 'failures': self.failures}
+
+    def bind(self, ds_dt, axes, dx_dt, parameters=None):
+        axes = tuple(axes)
+        self.__bound[dx_dt] = ds_dt.sparse_yacobian.compile(axes, [f'd{o}_d{i}' for o in axes for i in axes],
+                                                            parameters=parameters)
+
+    def jacobian(self, x, dx_dt) -> list[list[float]]:
+        """Jacobian of dx_dt at x as rows."""
+        self.jacobians += 1
+        n = len(x)
+        if dx_dt in self.__bound:
+            flat = self.__bound[dx_dt](x)
+            return [flat[i*n:(i + 1)*n] for i in range(n)]
+        # forward differences, one evaluation per column
+        fx = dx_dt(x)
+        columns = []
+        for j in range(n):
+            e = 1.5e-8*max(abs(x[j]), 1.0)
+            xj = list(x)
+            xj[j] += e
+            columns.append([(a - b)/e for a, b in zip(dx_dt(xj), fx)])
+        self.evaluations += n + 1
+        return [list(row) for row in zip(*columns)]
+
+    def factor(self, x, dx_dt, c, refresh=False):
+        """Factorisation of I - c*J, reusing the Jacobian and the last factorisation when possible."""
+        jac = self.__jacobian
+        if refresh or jac is None or jac[0] is not dx_dt or jac[2] >= self.max_age:
+            self.__jacobian = jac = [dx_dt, self.jacobian(x, dx_dt), 0]
+            self.__lu = None
+        if self.__lu is None or self.__lu[0] != c:
+            J = jac[1]
+            n = len(J)
+            self.__lu = (c, lu_factor([[float(i == j) - c*J[i][j] for j in range(n)] for i in range(n)]))
+            self.factorizations += 1
+        return self.__lu[1]
+
+    def age(self):
+        if self.__jacobian is not None:
+            self.__jacobian[2] += 1
+
+    def newton(self, a, c, y, dx_dt):
+        """
+        Solves y = a + c*dx_dt(y) by simplified Newton iterations from the guess y.
+        None when they do not converge.
+        """
+        rtol, atol = self.rtol, self.atol
+        previous = None
+        try:
+            lu = self.factor(y, dx_dt, c)
+            for _ in range(self.max_iterations):
+                f = dx_dt(y)
+                self.evaluations += 1
+                self.newton_iterations += 1
+                d = lu_solve(lu, [ai + c*fi - yi for ai, fi, yi in zip(a, f, y)])
+                y = [yi + di for yi, di in zip(y, d)]
+                norm = math.sqrt(sum((di/(atol + rtol*abs(yi)))**2 for di, yi in zip(d, y))/len(y)) if y else 0.0
+                if norm <= 1.0:
+                    return y
+                if not math.isfinite(norm) or (previous is not None and norm > 0.9*previous):
+                    return None
+                previous = norm
+        except (OverflowError, ZeroDivisionError):
+            pass
+        return None
+
+    def solve(self, a, c, y, dx_dt):
+        """`newton`, retried once with a fresh Jacobian when the kept one was old."""
+        solution = self.newton(a, c, y, dx_dt)
+        if solution is None and self.__jacobian[2] > 0:
+            self.factor(y, dx_dt, c, refresh=True)
+            solution = self.newton(a, c, y, dx_dt)
+        return solution
+
+    def euler(self, x, dx_dt, h):
+        """Backward Euler step of size h, halved while Newton fails."""
+        y = self.solve(x, h, list(x), dx_dt)
+        if y is None:
+            self.failures += 1
+            if h < 1e-10*self.dt:
+                raise RuntimeError(f'Newton iterations do not converge, step {h}')
+            return self.euler(self.euler(x, dx_dt, h/2), dx_dt, h/2)
+        self.steps += 1
+        self.age()
+        return y
+
+
+class backward_euler_integrator(implicit_integrator):
+    """First order, L-stable: y = x + dt*dx_dt(y)."""
+    def step(self, x, dx_dt):
+        return self.euler(x, dx_dt, self.dt)
+
+
+class bdf2_integrator(implicit_integrator):
+    """
+    Second order backward differentiation formula,
+    y = 4/3*x - 1/3*x_previous + 2/3*dt*dx_dt(y).
+    Starts (and restarts after a failed step or a state set from outside)
+    with backward Euler.
+    """
+    def __init__(self, dt, inside_iterations=None, rtol=1e-6, atol=1e-9, max_iterations=8, max_age=20):
+        super().__init__(dt, inside_iterations, rtol, atol, max_iterations, max_age)
+        self.__history = (None, None)  # (last returned state, the state before it)
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state['_bdf2_integrator__history'] = (None, None)
+        return state
+
+    def reset(self):
+        super().reset()
+        self.__history = (None, None)
+
+    def step(self, x, dx_dt):
+        h = self.dt
+        last, previous = self.__history
+        y = None
+        if last is x:
+            a = [4/3*v - 1/3*w for v, w in zip(x, previous)]
+            y = self.solve(a, 2/3*h, [2*v - w for v, w in zip(x, previous)], dx_dt)
+            if y is None:
+                self.failures += 1
+            else:
+                self.steps += 1
+                self.age()
+        if y is None:
+            y = self.euler(x, dx_dt, h)
+        self.__history = (y, x)
+        return y
+
+
+class rosenbrock_integrator(implicit_integrator):
+    """
+    Two-stage L-stable Rosenbrock method ROS2 (Verwer et al.): linearly
+    implicit, two solves with I - gamma*h*J per step and no Newton iterations.
+
+    Like dopri5, the step size is adapted inside every `dt*inside_iterations`
+    with the embedded first order solution x + h*k1. ROS2 keeps order 2 with
+    an approximate Jacobian; stability does not, so J is refreshed every
+    `max_age` accepted steps (every step by default).
+    """
+    gamma = 1 + 1/math.sqrt(2)
+
+    def __init__(self, dt, inside_iterations=None, rtol=1e-6, atol=1e-9, max_age=1, h=None):
+        super().__init__(dt, inside_iterations, rtol, atol, max_age=max_age)
+        self.initial_h = self.h = dt if h is None else h
+
+    def reset(self):
+        super().reset()
+        self.h = self.initial_h
+
+    def step(self, x, dx_dt):
+        y, _ = self.attempt(x, dx_dt, self.dt)
+        self.steps += 1
+        self.age()
+        return y
+
+    def attempt(self, x, dx_dt, h):
+        """One step of size h: the new state and its scaled error."""
+        lu = self.factor(x, dx_dt, self.gamma*h)
+        k1 = lu_solve(lu, dx_dt(x))
+        f1 = dx_dt([v + h*k for v, k in zip(x, k1)])
+        k2 = lu_solve(lu, [f - 2*k for f, k in zip(f1, k1)])
+        self.evaluations += 2
+        y = [v + h*(1.5*p + 0.5*q) for v, p, q in zip(x, k1, k2)]
+        rtol, atol = self.rtol, self.atol
+        err = sum((0.5*h*(p + q)/(atol + rtol*max(abs(v), abs(w))))**2
+                  for v, w, p, q in zip(x, y, k1, k2))
+        return y, (err/len(x))**0.5 if x else 0.0
+
+    def integrate(self, x, dx_dt):
+        if isinstance(x, dict):
+            return self.integrate_vector(x, dx_dt)
+        return self.adapt(x, dx_dt, self.dt*self.ii)
+
+    def advance(self, x, dx_dt):
+        return self.adapt(x, dx_dt, self.dt)
+
+    def adapt(self, x, dx_dt, t_end):
+        """Integrates over t_end with adaptive steps."""
+        t = 0.0
+        while t_end - t > 1e-12*t_end:
+            h = min(self.h, t_end - t)
+            if h <= 1e-14*t_end:
+                raise RuntimeError(f'step size underflow: {h}')
+            try:
+                y, err = self.attempt(x, dx_dt, h)
+            except (OverflowError, ZeroDivisionError):
+                y, err = None, math.inf
+            if not math.isfinite(err):
+                err = math.inf
+            factor = 0.9*err**-0.5 if err > 0 else 5.0
+            if err <= 1.0:
+                x = y
+                t += h
+                self.steps += 1
+                self.age()
+                if h == self.h:
+                    self.h = h*min(5.0, max(0.2, factor))
+            else:
+                self.failures += 1
+                self.h = h*max(0.2, factor)
+        return x
+
+
+def _normals(rng: random.Random, n) -> list:
+    """n (rounded up to even) standard normal numbers, Box–Muller on pairs of uniforms."""
+    uniform = rng.random
+    log, sqrt, cos, sin, tau = math.log, math.sqrt, math.cos, math.sin, math.tau
+    out = []
+    for _ in range((n + 1)//2):
+        r = sqrt(-2*log(1.0 - uniform()))
+        t = tau*uniform()
+        out += (r*cos(t), r*sin(t))
+    return out
+
+
+class stochastic_integrator(integrator):
+    """
+    Ito equations dx = f(x) dt + g(x) dW with diagonal noise: `diffusion` is
+    a vector function giving g for the axes driven by their own independent
+    Wiener process, axes it has no output for have no noise.
+
+    Normal numbers are drawn `block` at a time from a `random.Random` stream
+    seeded with `seed` and the path number, `system.run_ensemble` starts
+    member j on path j, so runs are reproducible member by member.
+    """
+    lists = True
+    batched = False
+
+    def __init__(self, diffusion: _ve.vector_function, dt, inside_iterations=None, seed=None, block=4096):
+        super().__init__(dt, inside_iterations)
+        self.diffusion = diffusion
+        self.seed = seed
+        self.block = block
+        self.__bound = {}
+        self.path(0)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_stochastic_integrator__bound'] = {}
+        return state
+
+    def bind(self, ds_dt, axes, dx_dt, parameters=None):
+        missing = [a for a in self.diffusion.out_axes if a not in axes]
+        if missing:
+            raise ValueError(f'diffusion of axes {missing} that the system does not have')
+        self.__bound[dx_dt] = self.compile_diffusion(axes)
+
+    def compile_diffusion(self, axes):
+        noisy = [i for i, a in enumerate(axes) if a in self.diffusion.out_axes]
+        return self.diffusion.compile(axes, [axes[i] for i in noisy]), noisy
+
+    def path(self, j):
+        """Restarts the noise with the stream of path j."""
+        self.__rng = random.Random(None if self.seed is None else f'{self.seed}:{j}')
+        self.__noise = []
+        self.__used = 0
+
+    def noise(self, n) -> list:
+        """n standard normal numbers from the stream of the current path."""
+        i = self.__used
+        if i + n > len(self.__noise):
+            # blocks double up to `block`, short paths do not draw a whole block
+            size = max(n, min(self.block, 2*len(self.__noise)))
+            self.__noise = self.__noise[i:] + _normals(self.__rng, size)
+            i = 0
+        self.__used = i + n
+        return self.__noise[i:i + n]
+
+    def diffusion_of(self, dx_dt):
+        if dx_dt not in self.__bound:
+            raise ValueError('dx_dt is not bound, integrate through system')
+        return self.__bound[dx_dt]
+
+
+class euler_maruyama_integrator(stochastic_integrator):
+    """Strong order 1/2."""
+    def step(self, x, dx_dt):
+        g, noisy = self.diffusion_of(dx_dt)
+        dt = self.dt
+        sq = math.sqrt(dt)
+        y = [a + dt*k for a, k in zip(x, dx_dt(x))]
+        for i, b, z in zip(noisy, g(x), self.noise(len(noisy))):
+            y[i] += b*sq*z
+        return y
+
+
+class milstein_integrator(stochastic_integrator):
+    """
+    Strong order 1 for diagonal noise: adds 1/2 g dg/dx (dW² - dt) with
+    dg/dx from the symbolic `yacobian` of the diffusion.
+    """
+    def compile_diffusion(self, axes):
+        g, noisy = super().compile_diffusion(axes)
+        dg = self.diffusion.sparse_yacobian.compile(axes, [f'd{axes[i]}_d{axes[i]}' for i in noisy])
+        return (g, dg), noisy
+
+    def step(self, x, dx_dt):
+        (g, dg), noisy = self.diffusion_of(dx_dt)
+        dt = self.dt
+        sq = math.sqrt(dt)
+        y = [a + dt*k for a, k in zip(x, dx_dt(x))]
+        for i, b, db, z in zip(noisy, g(x), dg(x), self.noise(len(noisy))):
+            y[i] += b*sq*z + 0.5*b*db*dt*(z*z - 1)
+        return y
+
+
+class event:
+    """
+    Zero crossing of a scalar function of the state, written like a vector
+    function: `event(lambda x, y: x*x + y*y - 100, terminal=True)`.
+
+    `direction` +1 only counts crossings from negative to positive, -1 only
+    from positive to negative, 0 both. A `terminal` event stops the run.
+    `name` defaults to the name of a def function; unnamed lambdas are
+    reported by `find_events` as `event{k}`, k their position in the list.
+    """
+    def __init__(self, function: Callable, direction=0, terminal=False, name=None, input_signature=None):
+        signature = function.__code__.co_varnames[:function.__code__.co_argcount] \
+            if input_signature is None else input_signature
+        if name is None and function.__name__ != '<lambda>':
+            name = function.__name__
+        self.name = name
+        self.direction = direction
+        self.terminal = terminal
+        self.function = _ve.vector_function(lambda **kw: {'g': function(**kw)}, input_signature=signature)
+
+    def crossed(self, g0, g1) -> bool:
+        if g0 < 0.0 <= g1:
+            return self.direction >= 0
+        if g0 > 0.0 >= g1:
+            return self.direction <= 0
+        return False
+
+
+def _hermite(x0, f0, x1, f1, h, theta) -> list:
+    """Cubic Hermite interpolation between two states and their derivatives."""
+    t2, t3 = theta*theta, theta*theta*theta
+    a, b, c, d = 2*t3 - 3*t2 + 1, h*(t3 - 2*t2 + theta), 3*t2 - 2*t3, h*(t3 - t2)
+    return [a*p + b*q + c*r + d*s for p, q, r, s in zip(x0, f0, x1, f1)]
+
+
+class vector_steps:
+    """
+    Drives an integrator that steps on vectors (`lists = False`) on the layout
+    lists of a `system`: states are unpacked to vectors around every call and
+    the wrapped integrator gets the vector function as `dx_dt`.
+    """
+    lists = True
+    batched = False
+
+    def __init__(self, solver: integrator, layout: _ve.layout, ds_dt: _ve.vector_function):
+        self.solver = solver
+        self.layout = layout
+        self.ds_dt = ds_dt
+        self.parameters = None
+
+    @property
+    def dt(self):
+        return self.solver.dt
+
+    @property
+    def ii(self):
+        return self.solver.ii
+
+    def get_stats(self) -> dict:
+        return self.solver.get_stats()
+
+    def bind(self, ds_dt, axes, dx_dt, parameters=None):
+        self.solver.bind(ds_dt, axes, dx_dt, parameters)
+        self.parameters = parameters
+
+    def path(self, j):
+        self.solver.path(j)
+
+    def reset(self):
+        self.solver.reset()
+
+    def dx_dt(self):
+        if not self.parameters:
+            return self.ds_dt
+        return functools.partial(self.ds_dt, **dict(zip(self.ds_dt.parameter_names, self.parameters)))
+
+    def integrate(self, x, dx_dt):
+        return self.layout.pack(self.solver.integrate(self.layout.unpack(x), self.dx_dt()))
+
+    def advance(self, x, dx_dt):
+        return self.layout.pack(self.solver.advance(self.layout.unpack(x), self.dx_dt()))
 
 
 class system:
-    def __init__(self, ds_dt: _ve.vector_function, solver, initials: _ve.vector = None):
-        if initials is None:
-            initials = _ve.vector({i: random.gauss() for i in ds_dt.out_axes})
-        self.state: _ve.vector = initials
+    def __init__(self, ds_dt: _ve.vector_function, solver, initials: _ve.vector = None, parameters: dict = None):
         self.ds_dt = ds_dt
+        # parameter values of this system: copied from ds_dt, changed by `bind` and
+        # passed to everything compiled from ds_dt, so systems sharing ds_dt do not interfere
+        self.parameter_values: list = list(ds_dt.parameter_values)
+        self.bind(**(parameters or {}))
         self.solver: 'integrator' = solver
+        # outputs first, then inputs without derivative (they stay constant)
+        self.layout = _ve.layout(
+            [*ds_dt.out_axes, *(a for a in ds_dt.in_order if a not in ds_dt.out_axes)])
+        self.rhs = ds_dt.compile(self.layout.axes, self.layout.axes, parameters=self.parameter_values)
+        # what the system integrates through: the solver itself or its list-level front
+        self.stepper = solver if solver.lists else vector_steps(solver, self.layout, ds_dt)
+        self.stepper.bind(ds_dt, self.layout.axes, self.rhs, self.parameter_values)
+        self.stats = {}
+        if initials is None:
+            initials = _ve.vector({i: random.gauss() for i in ds_dt.out_axes})
+        self.state = initials
+
+    @property
+    def state(self) -> _ve.state_view:
+        """Values of the state when read; assigning an axis (`sys.state['x'] = 1`) changes the state."""
+        return _ve.state_view(self.__state)
+
+    @state.setter
+    def state(self, value: dict):
+        self.__state = _ve.state_vector.from_vector(value, self.layout)
+
+    @property
+    def parameters(self) -> dict:
+        return dict(zip(self.ds_dt.parameter_names, self.parameter_values))
+
+    def bind(self, **values) -> 'system':
+        """
+        Sets parameter values of this system only, nothing is rebuilt; the
+        vector function and other systems built on it keep theirs.
+        """
+        names = self.ds_dt.parameter_names
+        for name in values:
+            if name not in names:
+                raise KeyError(f'{name!r} is not a parameter, parameters: {names}')
+        for name, value in values.items():
+            self.parameter_values[names.index(name)] = value
+        return self
 
     def update(self):
-        self.state = self.solver.integrate(self.state, self.ds_dt)
+        self.__state.data = self.stepper.integrate(self.__state.data, self.rhs)
+
+    def records(self, t_end, t_start=0) -> tuple[int, float]:
+        """Number of states `run` records between t_start and t_end and the time between them."""
+        T = self.stepper.dt*self.stepper.ii
+        return max(1, math.ceil((t_end - t_start)/T - 1e-9)), T
 
     def run(self, t_end, t_start=0):
-        t = t_start
-        history = {
-            's': _ve.vector({k:[] for k in self.state.keys()}),
-            't': []
-        }
-        while True:
-            history['s'].apply_vector_operation(self.state, lambda x, y: x.append(y))
-            history['t'].append(t)
+        """
+        History of the state, one preallocated array('d') column per axis plus 'time'.
+        The state is recorded before every update, the last update is not recorded.
+        """
+        before = self.stepper.get_stats()
+        n, T = self.records(t_end, t_start)
+        columns = [array('d', bytes(8*n)) for _ in self.layout.axes]
+        for k in range(n):
+            for column, value in zip(columns, self.__state.data):
+                column[k] = value
             self.update()
-            t += self.solver.dt*self.solver.ii
-            if t >= t_end:
-                break
-        history['s']['time'] = history['t']
-        return history['s']
+        history = self.layout.unpack(columns)
+        history['time'] = array('d', (t_start + k*T for k in range(n)))
+        self.stats = {k: v - before[k] for k, v in self.stepper.get_stats().items()}
+        return history
+
+    def iterate(self, t_end, t_start=0, stride=1):
+        """
+        Lazily yields `(t, state_vector)` for every `stride`-th state that `run`
+        would record; nothing is kept between yields. See `diffeq.streaming`
+        for stages (decimation, windows, running reducers) to plug into it.
+        """
+        before = self.stepper.get_stats()
+        n, T = self.records(t_end, t_start)
+        lay = self.layout
+        try:
+            for k in range(n):
+                if k % stride == 0:
+                    yield t_start + k*T, _ve.state_vector(lay, self.__state.data)
+                self.update()
+        finally:
+            self.stats = {k: v - before[k] for k, v in self.stepper.get_stats().items()}
 
+    def run_ensemble(self, initials: list, t_end, t_start=0) -> list:
+        """
+        Integrates all initial states together and returns one history per member,
+        shaped like the output of `run`. The state of the system is not changed.
+
+        Members are stored structure-of-arrays (every value of the first axis,
+        then of the second, ...), so every stage evaluates the compiled
+        right-hand side over the whole batch in one call. Solvers that are
+        not `batched` (the implicit ones) integrate the members one by one,
+        each from a reset integrator.
+        """
+        before = self.stepper.get_stats()
+        m = len(initials)
+        n, T = self.records(t_end, t_start)
+        columns = [array('d', bytes(8*n)) for _ in range(len(self.layout)*m)]
+        if self.stepper.batched:
+            rhs = self.ds_dt.compile(self.layout.axes, self.layout.axes, batch=True,
+                                     parameters=self.parameter_values)
+            x = [vec.get(a, 0.0) for a in self.layout.axes for vec in initials]
+            for k in range(n):
+                for column, value in zip(columns, x):
+                    column[k] = value
+                x = self.stepper.integrate(x, rhs)
+        else:
+            for j, vec in enumerate(initials):
+                self.stepper.reset()
+                self.stepper.path(j)
+                x = self.layout.pack(vec)
+                member = columns[j::m]
+                for k in range(n):
+                    for column, value in zip(member, x):
+                        column[k] = value
+                    x = self.stepper.integrate(x, self.rhs)
+        times = array('d', (t_start + k*T for k in range(n)))
+        histories = []
+        for j in range(m):
+            history = self.layout.unpack(columns[j::m])
+            history['time'] = array('d', times)
+            histories.append(history)
+        self.stats = {k: v - before[k] for k, v in self.stepper.get_stats().items()}
+        return histories
+
+    def run_statistics(self, initials: list, t_end, t_start=0) -> tuple[dict, dict]:
+        """
+        Mean and variance over the ensemble of every axis at every time `run`
+        records, as two histories shaped like its output. Members are
+        integrated one by one and folded in on the fly (Welford's method), so
+        memory does not depend on the number of members. The state of the
+        system is not changed.
+        """
+        before = self.stepper.get_stats()
+        n, T = self.records(t_end, t_start)
+        d = len(self.layout)
+        mean = [array('d', bytes(8*n)) for _ in range(d)]
+        m2 = [array('d', bytes(8*n)) for _ in range(d)]
+        for j, vec in enumerate(initials):
+            self.stepper.reset()
+            self.stepper.path(j)
+            x = self.layout.pack(vec)
+            for k in range(n):
+                for mu, s2, value in zip(mean, m2, x):
+                    delta = value - mu[k]
+                    mu[k] += delta/(j + 1)
+                    s2[k] += delta*(value - mu[k])
+                x = self.stepper.integrate(x, self.rhs)
+        m = len(initials)
+        times = array('d', (t_start + k*T for k in range(n)))
+        mean_history = self.layout.unpack(mean)
+        mean_history['time'] = times
+        variance = self.layout.unpack([array('d', (s/(m - 1) if m > 1 else 0.0 for s in s2)) for s2 in m2])
+        variance['time'] = array('d', times)
+        self.stats = {k: v - before[k] for k, v in self.stepper.get_stats().items()}
+        return mean_history, variance
+
+    def find_events(self, events: list, t_end, t_start=0, tol=1e-12) -> list[tuple[str, float, _ve.vector]]:
+        """
+        Integrates from t_start towards t_end checking the events after every
+        `dt` and returns their crossings in time order as (name, t, state),
+        nothing else is recorded. A crossing is located inside its `dt` by
+        regula falsi (Illinois) on the cubic Hermite interpolation of the
+        state, to `tol` relative to dt. The run stops at the first crossing
+        of a terminal event. Steps are whole `dt`, so the last one can pass
+        t_end: crossings after t_end are dropped, and without a terminal
+        crossing the state of the system is left at the end of the last step,
+        the first multiple of dt after t_start at or past t_end.
+        """
+        lay = self.layout
+        names = [f'event{i}' if e.name is None else e.name for i, e in enumerate(events)]
+        for name, e in zip(names, events):
+            missing = e.function.in_axes - set(lay.axes)
+            if missing:
+                raise ValueError(f'event {name!r} reads axes {sorted(missing)} that the system does not have')
+        before = self.stepper.get_stats()
+        functions = [e.function.compile(lay.axes, ('g',)) for e in events]
+        dt = self.stepper.dt
+        steps = max(0, math.ceil((t_end - t_start)/dt - 1e-9))
+        x = self.__state.data
+        g = [f(x)[0] for f in functions]
+        found = []
+        try:
+            for k in range(steps):
+                y = self.stepper.advance(x, self.rhs)
+                g1 = [f(y)[0] for f in functions]
+                crossed = [i for i, e in enumerate(events) if e.crossed(g[i], g1[i])]
+                if crossed:
+                    f0, f1 = self.rhs(x), self.rhs(y)
+                    located = sorted(
+                        (self.__locate(functions[i], g[i], g1[i], x, f0, y, f1, dt, tol), i) for i in crossed)
+                    for (theta, z), i in located:
+                        t = t_start + (k + theta)*dt
+                        if t > t_end:
+                            break
+                        found.append((names[i], t, lay.unpack(z)))
+                        if events[i].terminal:
+                            self.__state.data = z
+                            return found
+                x, g = y, g1
+            self.__state.data = x
+            return found
+        finally:
+            self.stats = {k: v - before[k] for k, v in self.stepper.get_stats().items()}
+
+    @staticmethod
+    def __locate(function, g0, g1, x0, f0, x1, f1, h, tol):
+        a, b, ga, gb = 0.0, 1.0, g0, g1
+        z = x1
+        side = 0
+        for _ in range(100):
+            if b - a <= tol or gb == 0.0:
+                break
+            theta = (a*gb - b*ga)/(gb - ga)
+            z = _hermite(x0, f0, x1, f1, h, theta)
+            gt = function(z)[0]
+            if (gt < 0.0) == (ga < 0.0) and gt != 0.0:
+                a, ga = theta, gt
+                if side == -1:
+                    gb *= 0.5
+                side = -1
+            else:
+                b, gb = theta, gt
+                if side == 1:
+                    ga *= 0.5
+                side = 1
+        return b, _hermite(x0, f0, x1, f1, h, b)
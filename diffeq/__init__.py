@@ -9,6 +9,18 @@ __all__ = [
     'integrator',
     'euler_integrator',
     'rk4_integrator',
+    'rk38_integrator',
+    'rk6_integrator',
+    'verner6_integrator',
+    'dopri5_integrator',
+    'taylor_integrator',
+    'backward_euler_integrator',
+    'bdf2_integrator',
+    'rosenbrock_integrator',
+    'leapfrog_integrator',
+    'yoshida4_integrator',
+    'euler_maruyama_integrator',
+    'milstein_integrator',
     'jacobian',
     'divergence',
     'vector',
@@ -0,0 +1,253 @@
+"""
+Equilibria of vector functions: points where every derivative is zero.
+
+Damped Newton iterations run from many seeds at once. The right-hand side
+and the symbolic Jacobian (`vector_function.sparse_yacobian`) are compiled in
+batch form and evaluated once per iteration for all seeds that are still
+running. The converged roots are merged by a spatial hash and classified by
+the eigenvalues of their Jacobian:
+
+    finder = equilibrium_finder(lorenz)
+    for e in finder.find(seeds, rho=28):
+        print(e.kind, e.state, e.eigenvalues)
+"""
+import itertools
+import math
+
+import diffeq.utils.vectors as _ve
+from diffeq.utils.linalg import lu_factor, lu_solve, eigenvalues
+
+
+class equilibrium:
+    """Root of a vector function with the eigenvalues of its Jacobian and the number of seeds that reached it."""
+    def __init__(self, state: _ve.vector, eigenvalues: list[complex] | None, kind: str | None, residual: float,
+                 seeds=1):
+        self.state = state
+        self.eigenvalues = eigenvalues
+        self.kind = kind
+        self.residual = residual
+        self.seeds = seeds
+
+    @property
+    def stable(self) -> bool | None:
+        """None when the eigenvalues are unknown."""
+        if self.eigenvalues is None:
+            return None
+        return all(e.real < 0 for e in self.eigenvalues)
+
+    def __repr__(self):
+        return f'equilibrium({self.kind}, {dict(self.state)})'
+
+
+def classify(eigenvalues: list[complex], tol=1e-9) -> str:
+    """
+    'stable node', 'unstable node', 'saddle' (complex eigenvalues make them
+    'focus' and 'saddle-focus'), 'center' when every eigenvalue is purely
+    imaginary and 'non-hyperbolic' when some other real part is within
+    `tol` (relative to the largest eigenvalue) of zero.
+    """
+    scale = max((abs(e) for e in eigenvalues), default=0.0)
+    zero = tol*max(scale, 1.0)
+    rotating = any(abs(e.imag) > zero for e in eigenvalues)
+    if any(abs(e.real) <= zero for e in eigenvalues):
+        if rotating and all(abs(e.real) <= zero and abs(e.imag) > zero for e in eigenvalues):
+            return 'center'
+        return 'non-hyperbolic'
+    negative = sum(1 for e in eigenvalues if e.real < 0)
+    if negative in (0, len(eigenvalues)):
+        return ('stable ' if negative else 'unstable ') + ('focus' if rotating else 'node')
+    return 'saddle-focus' if rotating else 'saddle'
+
+
+class root_set:
+    """
+    Spatial hash of roots: points closer than `resolution` in every axis are
+    one root. Cells are 4*resolution wide; a point is only compared with the
+    neighbouring cells it is within `resolution` of.
+    """
+    def __init__(self, resolution):
+        self.resolution = resolution
+        self.size = 4*resolution
+        self.cells = {}
+        self.roots = []
+
+    def __cells(self, x):
+        options = []
+        for v in x:
+            c = math.floor(v/self.size)
+            near = [c]
+            if v - c*self.size < self.resolution:
+                near.append(c - 1)
+            if (c + 1)*self.size - v < self.resolution:
+                near.append(c + 1)
+            options.append(near)
+        return itertools.product(*options)
+
+    def find(self, x) -> int | None:
+        """Index of the root x belongs to."""
+        for cell in self.__cells(x):
+            for i in self.cells.get(cell, ()):
+                if all(abs(a - b) <= self.resolution for a, b in zip(x, self.roots[i])):
+                    return i
+        return None
+
+    def add(self, x) -> int:
+        i = self.find(x)
+        if i is None:
+            i = len(self.roots)
+            self.roots.append(x)
+            cell = tuple(math.floor(v/self.size) for v in x)
+            self.cells.setdefault(cell, []).append(i)
+        return i
+
+
+class equilibrium_finder:
+    """
+    Damped Newton from many seeds at once. A step is halved (at most
+    `max_halvings` times) until it decreases the norm of the right-hand
+    side. A seed has converged when the max norm of the right-hand side is
+    at most `tol` and its last step at most a hundredth of `resolution`
+    (near multiple roots, where Newton converges slowly, the residual is
+    small long before the root is), it is dropped when its Jacobian is
+    singular or it does not converge in `max_iterations` iterations.
+    """
+    def __init__(self, ds_dt: _ve.vector_function, tol=1e-10, max_iterations=50, max_halvings=10,
+                 resolution=1e-6):
+        if set(ds_dt.in_order) != set(ds_dt.out_axes):
+            raise ValueError('equilibria need the same input and output axes')
+        self.ds_dt = ds_dt
+        self.tol = tol
+        self.max_iterations = max_iterations
+        self.max_halvings = max_halvings
+        self.resolution = resolution
+        self.layout = _ve.layout(ds_dt.out_axes)
+        axes = self.layout.axes
+        self.rhs = ds_dt.compile(axes, axes, batch=True)
+        self.jacobian = ds_dt.sparse_yacobian.compile(axes, [f'd{o}_d{i}' for o in axes for i in axes], batch=True)
+        self.stats = self.counters()
+
+    @staticmethod
+    def counters() -> dict:
+        return dict.fromkeys(('iterations', 'evaluations', 'jacobians', 'halvings', 'converged', 'failed'), 0)
+
+    def bind(self, **values) -> 'equilibrium_finder':
+        """Sets parameters of the vector function, nothing is rebuilt."""
+        self.ds_dt.bind(**values)
+        return self
+
+    def solve(self, seeds: list[list[float]]) -> list:
+        """
+        Newton iterations from seeds in layout order; the root for every seed,
+        None where it failed. The counts are added to `stats`.
+        """
+        n = len(self.layout)
+        roots = [None]*len(seeds)
+        active = list(range(len(seeds)))
+        x = [list(map(float, s)) for s in seeds]
+        fx = self.__evaluate(x, active)
+        moved = [math.inf]*len(seeds)
+        xtol = self.resolution/100
+        stats = self.stats
+        for _ in range(self.max_iterations + 1):
+            running = []
+            for j in active:
+                norm = max(map(abs, fx[j]))
+                if norm == 0.0 or norm <= self.tol and moved[j] <= xtol:
+                    roots[j] = x[j]
+                    stats['converged'] += 1
+                elif math.isfinite(norm):
+                    running.append(j)
+                else:
+                    stats['failed'] += 1
+            active = running
+            if not active:
+                break
+            stats['iterations'] += 1
+            m = len(active)
+            flat = self.jacobian([x[j][i] for i in range(n) for j in active])
+            stats['jacobians'] += m
+            steps = {}
+            for k, j in enumerate(active):
+                J = [[flat[(r*n + c)*m + k] for c in range(n)] for r in range(n)]
+                try:
+                    steps[j] = lu_solve(lu_factor(J), [-v for v in fx[j]])
+                except ZeroDivisionError:
+                    stats['failed'] += 1
+            active = [j for j in active if j in steps]
+            # halve the steps of the seeds whose residual grows, all of them evaluated together
+            size = {j: sum(v*v for v in fx[j]) for j in active}
+            pending, lam = list(active), 1.0
+            for halving in range(self.max_halvings + 1):
+                trial = {j: [a + lam*d for a, d in zip(x[j], steps[j])] for j in pending}
+                f_trial = self.__evaluate(trial, pending)
+                last = halving == self.max_halvings
+                waiting = []
+                for j in pending:
+                    if last or sum(v*v for v in f_trial[j]) < (1 - lam/2)*size[j]:
+                        x[j], fx[j] = trial[j], f_trial[j]
+                        moved[j] = lam*max(map(abs, steps[j]))
+                    else:
+                        waiting.append(j)
+                pending = waiting
+                if not pending:
+                    break
+                lam *= 0.5
+                stats['halvings'] += len(pending)
+        else:
+            stats['failed'] += len(active)
+        return roots
+
+    def __evaluate(self, x, indices) -> dict:
+        n = len(self.layout)
+        m = len(indices)
+        if not m:
+            return {}
+        try:
+            flat = self.rhs([x[j][i] for i in range(n) for j in indices])
+        except (OverflowError, ZeroDivisionError, ValueError):
+            # evaluated one by one so only the seeds that fail are dropped
+            return {j: self.__evaluate_one(x[j]) for j in indices}
+        self.stats['evaluations'] += m
+        return {j: [flat[i*m + k] for i in range(n)] for k, j in enumerate(indices)}
+
+    def __evaluate_one(self, x) -> list[float]:
+        self.stats['evaluations'] += 1
+        try:
+            return list(self.rhs(x))
+        except (OverflowError, ZeroDivisionError, ValueError):
+            return [math.inf]*len(x)
+
+    def find(self, seeds: list, **parameters) -> list[equilibrium]:
+        """
+        Distinct equilibria reached from the seeds (vectors), optionally for
+        other parameter values, in the order they were first reached. A root
+        whose eigenvalues do not converge is kept with `eigenvalues` and
+        `kind` None.
+        """
+        if parameters:
+            self.bind(**parameters)
+        self.stats = self.counters()
+        lay = self.layout
+        roots = root_set(self.resolution)
+        counts = []
+        for root in self.solve([lay.pack(s) for s in seeds]):
+            if root is not None:
+                i = roots.add(root)
+                if i == len(counts):
+                    counts.append(0)
+                counts[i] += 1
+        if not roots.roots:
+            return []
+        n = len(lay)
+        m = len(roots.roots)
+        flat = self.jacobian([r[i] for i in range(n) for r in roots.roots])
+        f = self.rhs([r[i] for i in range(n) for r in roots.roots])
+        out = []
+        for k, (root, count) in enumerate(zip(roots.roots, counts)):
+            try:
+                ev = eigenvalues([[flat[(r*n + c)*m + k] for c in range(n)] for r in range(n)])
+            except ArithmeticError:
+                ev = None
+            residual = max(abs(f[i*m + k]) for i in range(n))
+            out.append(equilibrium(lay.unpack(root), ev, None if ev is None else classify(ev), residual, count))
+        return out
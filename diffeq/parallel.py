@@ -0,0 +1,75 @@
+"""
+Running independent trajectories on a pool of processes.
+
+Vector functions and integrators are pickled into the workers; the generated
+python functions of a program are not pickled and are compiled again in the
+worker on first use, once per chunk.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import math
+import os
+
+import diffeq.utils.vectors as _ve
+from diffeq.SDE import system
+
+
+def _run_chunk(jobs, batch, first):
+    # jobs of one chunk usually share the vector function and the integrator,
+    # after unpickling they are the same objects, so the program is compiled once;
+    # the integrator is reset and put on the noise path of the job number before
+    # every job, so results do not depend on how jobs are cut into chunks
+    systems = {}
+    out = [None]*len(jobs)
+    groups = {}
+    for i, (ds_dt, solver, initials, t_end, t_start) in enumerate(jobs):
+        key = (id(ds_dt), id(solver))
+        if key not in systems:
+            systems[key] = system(ds_dt, solver, initials)
+        sys = systems[key]
+        if batch and sys.stepper.batched:
+            groups.setdefault((key, t_end, t_start), []).append(i)
+            continue
+        sys.stepper.reset()
+        sys.stepper.path(first + i)
+        sys.state = initials
+        out[i] = sys.run(t_end, t_start)
+    for (key, t_end, t_start), indices in groups.items():
+        sys = systems[key]
+        sys.stepper.reset()
+        histories = sys.run_ensemble([jobs[i][2] for i in indices], t_end, t_start)
+        for i, history in zip(indices, histories):
+            out[i] = history
+    return out
+
+
+def run_jobs(jobs: list, max_workers=None, chunksize=None, batch=False) -> list:
+    """
+    Runs `(vector_function, integrator, initial state, t_end[, t_start])` jobs
+    on a process pool and returns the histories in the order of the jobs.
+
+    Jobs are sent in chunks of `chunksize` (by default about four chunks per
+    worker). With `batch=True` jobs of a chunk sharing the vector function,
+    a `batched` integrator and the time span are integrated together with
+    `system.run_ensemble`; for adaptive integrators they then share steps.
+    Otherwise every job starts from a reset integrator (`integrator.reset`)
+    on the noise path of its position in `jobs`, so the histories do not
+    depend on `chunksize`.
+    """
+    jobs = [(*job, 0) if len(job) == 4 else tuple(job) for job in jobs]
+    if not jobs:
+        return []
+    max_workers = os.cpu_count() if max_workers is None else max_workers
+    if chunksize is None:
+        chunksize = max(1, math.ceil(len(jobs)/(4*max_workers)))
+    chunks = [jobs[i:i + chunksize] for i in range(0, len(jobs), chunksize)]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(_run_chunk, chunks, [batch]*len(chunks),
+                               range(0, len(jobs), chunksize))
+        return [history for chunk in results for history in chunk]
+
+
+def run_parallel(ds_dt: _ve.vector_function, solver, initials: list, t_end, t_start=0,
+                 max_workers=None, chunksize=None, batch=False) -> list:
+    """`system(ds_dt, solver).run(t_end, t_start)` for every initial state, on a process pool."""
+    return run_jobs([(ds_dt, solver, x, t_end, t_start) for x in initials],
+                    max_workers=max_workers, chunksize=chunksize, batch=batch)
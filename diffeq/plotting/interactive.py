@@ -1,5 +1,10 @@
 from random import randint, random
+from array import array
 import random
+import base64
+import json
+import struct
+import sys
 import diffeq.utils.vectors as ve
 
 
@@ -96,7 +101,34 @@ void main(){
     gl.useProgram(program);
 
     //data list
-    let trajectores = LISTOFL;
+    function halfToFloat(h) {
+        const s = (h & 0x8000) ? -1 : 1, e = (h >> 10) & 0x1f, f = h & 0x3ff;
+        if (e === 0) return s * Math.pow(2, -14) * (f / 1024);
+        if (e === 31) return f ? NaN : s * Infinity;
+        return s * Math.pow(2, e - 15) * (1 + f / 1024);
+    }
+
+    function decodeTrajectory(t) {
+        if (Array.isArray(t)) return t;
+        const bin = atob(t.data);
+        const bytes = new Uint8Array(bin.length);
+        for (let i = 0; i < bin.length; i++) bytes[i] = bin.charCodeAt(i);
+        if (t.enc === 'f32') return new Float32Array(bytes.buffer);
+        const out = new Float32Array(bytes.length / 2);
+        if (t.enc === 'f16') {
+            const h = new Uint16Array(bytes.buffer);
+            for (let i = 0; i < h.length; i++) out[i] = halfToFloat(h[i]);
+        } else {
+            const q = new Int16Array(bytes.buffer);
+            for (let i = 0; i < q.length; i++) {
+                const k = i % 7;
+                out[i] = q[i] / 32767 * t.scale[k] + t.offset[k];
+            }
+        }
+        return out;
+    }
+
+    let trajectores = LISTOFL.map(decodeTrajectory);
     
     //grid
     const axisLength = 2.0;
@@ -255,15 +287,122 @@ def __transpose(traj, axes, color = __basic_grad, i = None):
     Tmax = max(traj['time'])
     for x, y, z, time in zip(traj[kx], traj[ky], traj[kz], traj['time']):
         t = (time - Tmin)/(Tmax - Tmin)
-        output += [x, y, z] + color(t = t, x = x, y = y, z = z, i = i)
+        output.extend((x, y, z))
+        output.extend(color(t = t, x = x, y = y, z = z, i = i))
 
     return output
 
 
-def generate_html(trajectores, axes, path = 'output.html', color = __basic_grad, title =''):
+def rdp_indices(xs, ys, zs, tolerance):
+    """Indices of the points kept by 3D Ramer–Douglas–Peucker simplification."""
+    n = len(xs)
+    if n < 3:
+        return list(range(n))
+    keep = [False]*n
+    keep[0] = keep[-1] = True
+    tol2 = tolerance*tolerance
+    stack = [(0, n - 1)]
+    while stack:
+        a, b = stack.pop()
+        ax, ay, az = xs[a], ys[a], zs[a]
+        dx, dy, dz = xs[b] - ax, ys[b] - ay, zs[b] - az
+        L2 = dx*dx + dy*dy + dz*dz
+        best, index = -1.0, -1
+        for i in range(a + 1, b):
+            px, py, pz = xs[i] - ax, ys[i] - ay, zs[i] - az
+            if L2 > 0:
+                u = min(1.0, max(0.0, (px*dx + py*dy + pz*dz)/L2))
+                px, py, pz = px - u*dx, py - u*dy, pz - u*dz
+            d2 = px*px + py*py + pz*pz
+            if d2 > best:
+                best, index = d2, i
+        if best > tol2:
+            keep[index] = True
+            stack.append((a, index))
+            stack.append((index, b))
+    return [i for i in range(n) if keep[i]]
+
+
+def simplify_trajectory(traj, axes, tolerance = None, pixels = None):
+    """
+    Drops points that lie closer than `tolerance` to the simplified polyline.
+    `pixels` sets the tolerance to the bounding box diagonal divided by it.
+    Every column (including 'time') is filtered, so colour gradients keep their times.
+    """
+    kx, ky, kz = axes
+    xs, ys, zs = traj[kx], traj[ky], traj[kz]
+    if tolerance is None:
+        if not pixels or not len(xs):
+            return traj
+        diag = sum((max(c) - min(c))**2 for c in (xs, ys, zs))**0.5
+        tolerance = diag/pixels
+    keep = rdp_indices(xs, ys, zs, tolerance)
+    return ve.vector({k: [v[i] for i in keep] for k, v in traj.items()})
+
+
+def simplify_trajectories(trajectores, axes, tolerance = None, pixels = None):
+    """Simplified trajectories and a report of the vertex reduction."""
+    out = [simplify_trajectory(t, axes, tolerance, pixels) for t in trajectores]
+    before = sum(len(t['time']) for t in trajectores)
+    after = sum(len(t['time']) for t in out)
+    return out, {'vertices_before': before, 'vertices_after': after,
+                 'reduction': before/after if after else 1.0}
+
+
+# largest finite float16
+_F16_MAX = 65504.0
+
+
+def __pack(vertices, encoding):
+    """
+    Vertex/colour data (7 floats per point) as a base64 payload for the page.
+    'f32' keeps float32, 'f16' halves the size, 'i16' quantises every
+    component to int16 between its minimum and maximum. Data with values
+    beyond the float16 range (|v| > 65504) is packed as 'f32' instead of 'f16';
+    the page reads the encoding of every payload.
+    """
+    if encoding == 'f16' and any(abs(v) > _F16_MAX for v in vertices):
+        encoding = 'f32'
+    if encoding == 'f32':
+        data = array('f', vertices)
+        if sys.byteorder == 'big':
+            data.byteswap()
+        return {'enc': 'f32', 'data': base64.b64encode(data.tobytes()).decode('ascii')}
+    if encoding == 'f16':
+        data = struct.pack(f'<{len(vertices)}e', *vertices)
+        return {'enc': 'f16', 'data': base64.b64encode(data).decode('ascii')}
+    if encoding == 'i16':
+        scale, offset = [], []
+        for k in range(7):
+            lo, hi = min(vertices[k::7], default=0.0), max(vertices[k::7], default=0.0)
+            offset.append((hi + lo)/2)
+            scale.append((hi - lo)/2 or 1.0)
+        q = [round((v - offset[j % 7])/scale[j % 7]*32767) for j, v in enumerate(vertices)]
+        data = struct.pack(f'<{len(q)}h', *q)
+        return {'enc': 'i16', 'scale': scale, 'offset': offset,
+                'data': base64.b64encode(data).decode('ascii')}
+    raise ValueError(f'unknown encoding {encoding!r}')
+
+
+def generate_html(trajectores, axes, path = 'output.html', color = __basic_grad, title ='', encoding = 'f32',
+                  tolerance = None, pixels = None, report: dict = None):
+    """
+    encoding: 'f32', 'f16', 'i16' embed binary base64 payloads decoded into
+    Float32Array by the page ('f16' trajectories out of the float16 range
+    are embedded as 'f32'), 'text' embeds plain JS number lists.
+    tolerance/pixels: optional level-of-detail simplification, see simplify_trajectory;
+    a `report` dict, if given, is filled with the report of simplify_trajectories.
+    """
+    if tolerance is not None or pixels is not None:
+        trajectores, reduction = simplify_trajectories(trajectores, axes, tolerance, pixels)
+        if report is not None:
+            report.update(reduction)
     T = [__transpose(t, axes, color) for t in trajectores]
-    Q = template.replace('LISTOFL', str(T)).replace('TITLE__', title)
+    if encoding == 'text':
+        payload = str(T)
+    else:
+        payload = json.dumps([__pack(t, encoding) for t in T])
+    Q = template.replace('LISTOFL', payload).replace('TITLE__', title)
     with open(path, 'w') as j:
         j.write(Q)
     return Q
-
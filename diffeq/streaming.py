@@ -0,0 +1,120 @@
+"""
+Stages for the `(t, state)` streams produced by `system.iterate`.
+
+Every stage takes a stream and returns a stream, so they nest:
+
+    stream = window(decimate(sys.iterate(1e4), 10), t_start=100)
+    stats = consume(stream, running_min(), running_max(), running_mean())
+
+Memory does not depend on the length of the run.
+"""
+import math
+
+import diffeq.utils.vectors as _ve
+
+
+def decimate(stream, k):
+    """Every k-th element of the stream."""
+    for i, item in enumerate(stream):
+        if i % k == 0:
+            yield item
+
+
+def window(stream, t_start=None, t_end=None):
+    """Elements with t_start <= t < t_end; stops reading the source after t_end."""
+    for t, state in stream:
+        if t_end is not None and t >= t_end:
+            break
+        if t_start is None or t >= t_start:
+            yield t, state
+
+
+def tap(stream, *reducers):
+    """Passes the stream through unchanged, feeding every element to the reducers."""
+    for t, state in stream:
+        for r in reducers:
+            r.update(t, state)
+        yield t, state
+
+
+def consume(stream, *reducers) -> list:
+    """Runs the stream to the end and returns the results of the reducers."""
+    for t, state in stream:
+        for r in reducers:
+            r.update(t, state)
+    return [r.result() for r in reducers]
+
+
+class reducer:
+    """Per-axis running statistic of a stream of states."""
+    def __init__(self):
+        self.layout = None
+        self.count = 0
+
+    def update(self, t, state: _ve.state_vector):
+        if self.layout is None:
+            self.layout = state.layout
+            self.start(state.data)
+        else:
+            self.add(state.data)
+        self.count += 1
+
+    def start(self, data):
+        raise NotImplementedError
+
+    def add(self, data):
+        raise NotImplementedError
+
+    def values(self) -> list:
+        raise NotImplementedError
+
+    def result(self) -> _ve.vector:
+        if self.layout is None:
+            return _ve.vector()
+        return self.layout.unpack(self.values())
+
+
+class running_min(reducer):
+    def start(self, data):
+        self.v = list(data)
+
+    def add(self, data):
+        self.v = [a if a <= b else b for a, b in zip(self.v, data)]
+
+    def values(self):
+        return self.v
+
+
+class running_max(reducer):
+    def start(self, data):
+        self.v = list(data)
+
+    def add(self, data):
+        self.v = [a if a >= b else b for a, b in zip(self.v, data)]
+
+    def values(self):
+        return self.v
+
+
+class running_mean(reducer):
+    """Mean (and variance, Welford's method) of every axis."""
+    def start(self, data):
+        self.mean = list(data)
+        self.m2 = [0.0]*len(data)
+
+    def add(self, data):
+        n = self.count + 1
+        delta = [x - m for x, m in zip(data, self.mean)]
+        self.mean = [m + d/n for m, d in zip(self.mean, delta)]
+        self.m2 = [s + d*(x - m) for s, d, x, m in zip(self.m2, delta, data, self.mean)]
+
+    def values(self):
+        return self.mean
+
+    def variance(self) -> _ve.vector:
+        if self.count < 2:
+            return self.layout.unpack([0.0]*len(self.mean)) if self.layout else _ve.vector()
+        return self.layout.unpack([s/(self.count - 1) for s in self.m2])
+
+    def std(self) -> _ve.vector:
+        return _ve.vector({k: math.sqrt(v) for k, v in self.variance().items()})
@@ -0,0 +1,224 @@
+"""
+Parameter sweeps and bifurcation diagrams on a pool of processes.
+
+For every point of a parameter grid the system is rebound (see
+`system.bind`), integrated from the same initial state and every
+state after the transient is fed to a recording rule. Rules reduce the
+states on the fly, so no history is kept; only what they record is sent
+back from the workers:
+
+    diagram = sweep(rossler, rk4_integrator(0.01, 5), vector(x=1, y=1, z=1), maxima('x'))
+    result = diagram.run({'c': linspace(2, 6, 400)}, 300, transient=200)
+    plt.plot(result['c'], result['x'], ',')
+
+The result has one array('d') column per parameter and per recorded value,
+one row per record.
+"""
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import itertools
+import math
+import os
+import time
+
+import diffeq.utils.vectors as _ve
+from diffeq.SDE import system
+
+
+class rule:
+    """Streaming record of one sweep point, it sees every state after the transient."""
+    columns: tuple = ()
+
+    def bind(self, layout: _ve.layout):
+        """Called once per worker with the layout of the states."""
+
+    def start(self, out: list):
+        """Called before every point, records are appended to the `out` columns."""
+        self.out = out
+
+    def add(self, t, x: list):
+        raise NotImplementedError
+
+
+class maxima(rule):
+    """
+    Local maxima of one axis. The maximum of the parabola through three
+    consecutive records is taken, which makes it much less sensitive to the
+    record interval than the largest record itself.
+    """
+    sign = 1.0
+
+    def __init__(self, axis):
+        self.axis = axis
+        self.columns = (axis,)
+
+    def bind(self, layout):
+        self.index = layout.index[self.axis]
+
+    def start(self, out):
+        super().start(out)
+        self.a = self.b = None
+
+    def add(self, t, x):
+        c = self.sign*x[self.index]
+        a, b = self.a, self.b
+        if a is not None and a < b >= c:
+            curvature = a - 2*b + c
+            peak = b - (a - c)*(a - c)/(8*curvature) if curvature else b
+            self.out[0].append(self.sign*peak)
+        self.a, self.b = b, c
+
+
+class minima(maxima):
+    """Local minima of one axis, see `maxima`."""
+    sign = -1.0
+
+
+class section(rule):
+    """
+    Crossings of the plane `axis = value` in `direction` (1 increasing,
+    -1 decreasing, 0 both), recording the `record` axes (by default all the
+    other axes) interpolated linearly between the two records around the crossing.
+    """
+    def __init__(self, axis, value=0.0, direction=1, record: tuple = None):
+        self.axis = axis
+        self.value = value
+        self.direction = direction
+        self.record = None if record is None else tuple(record)
+        self.columns = self.record or ()
+
+    def bind(self, layout):
+        if self.record is None:
+            self.record = tuple(a for a in layout.axes if a != self.axis)
+            self.columns = self.record
+        self.index = layout.index[self.axis]
+        self.recorded = [layout.index[a] for a in self.record]
+
+    def start(self, out):
+        super().start(out)
+        self.previous = None
+
+    def add(self, t, x):
+        g = x[self.index] - self.value
+        if self.previous is not None:
+            g0, x0 = self.previous
+            if (g0 < 0 <= g and self.direction >= 0) or (g0 > 0 >= g and self.direction <= 0):
+                theta = g0/(g0 - g)
+                for column, i in zip(self.out, self.recorded):
+                    column.append(x0[i] + theta*(x[i] - x0[i]))
+        self.previous = g, x
+
+
+def grid_points(grid) -> tuple[tuple, list]:
+    """Parameter names and points of a grid: a dict of value sequences (all combinations) or a list of dicts."""
+    if isinstance(grid, dict):
+        names = tuple(grid)
+        return names, list(itertools.product(*(grid[k] for k in names)))
+    names = tuple(grid[0]) if grid else ()
+    return names, [tuple(p[k] for k in names) for p in grid]
+
+
+def _run_chunk(ds_dt, solver, initials, rule, names, points, first, t_end, transient):
+    # one system per chunk: the program is compiled once and rebound for every point;
+    # the integrator is reset and put on the noise path of the point number before
+    # every point, so results do not depend on how the grid is cut into chunks
+    t = time.perf_counter()
+    sys = system(ds_dt, solver, initials)
+    stepper = sys.stepper
+    rule.bind(sys.layout)
+    x0 = sys.layout.pack(initials)
+    n, T = sys.records(t_end)
+    skip = min(n, max(0, math.ceil(transient/T - 1e-9)))
+    params = [array('d') for _ in names]
+    columns = [array('d') for _ in rule.columns]
+    before = stepper.get_stats()
+    for j, point in enumerate(points):
+        sys.bind(**dict(zip(names, point)))
+        stepper.reset()
+        stepper.path(first + j)
+        out = [array('d') for _ in rule.columns]
+        rule.start(out)
+        x = x0
+        for k in range(n):
+            if k >= skip:
+                rule.add(k*T, x)
+            x = stepper.integrate(x, sys.rhs)
+        rows = len(out[0]) if out else 0
+        for column, value in zip(params, point):
+            column.extend(itertools.repeat(value, rows))
+        for column, values in zip(columns, out):
+            column.extend(values)
+    stats = {k: v - before[k] for k, v in stepper.get_stats().items()}
+    stats.update(points=len(points), states=len(points)*n, seconds=time.perf_counter() - t)
+    return params, columns, stats
+
+
+class sweep:
+    """
+    Integrates a vector function for every point of a parameter grid and
+    records the states after a transient with a `rule` (`maxima`, `minima`,
+    `section`), on a pool of processes.
+    """
+    def __init__(self, ds_dt: _ve.vector_function, solver, initials: _ve.vector, rule: rule):
+        self.ds_dt = ds_dt
+        self.solver = solver
+        self.initials = initials
+        self.rule = rule
+        self.stats = {}
+
+    def run(self, grid, t_end, transient=0, max_workers=None, chunksize=None, progress=None) -> _ve.vector:
+        """
+        Runs every point of `grid` (see `grid_points`) from t=0 to t_end and
+        returns the records of the rule after `transient`, with the parameter
+        values of their point, as array('d') columns.
+
+        Points are sent in chunks of `chunksize` (by default about four chunks
+        per worker) and the results of a chunk are merged as soon as it
+        finishes. Every point starts from a reset integrator
+        (`integrator.reset`) on the noise path of its position in the grid,
+        so the result does not depend on `chunksize`. `progress`, if given,
+        is called with `stats` after every chunk: points and states done,
+        records, elapsed seconds, points and states per second, and the
+        summed statistics of the solver.
+        """
+        names, points = grid_points(grid)
+        for name in names:
+            if name not in self.ds_dt.parameter_names:
+                raise KeyError(f'{name!r} is not a parameter, parameters: {self.ds_dt.parameter_names}')
+        # bound here too, for rules that take their columns from the layout (section without `record`)
+        self.rule.bind(system(self.ds_dt, self.solver, self.initials).layout)
+        max_workers = os.cpu_count() if max_workers is None else max_workers
+        if chunksize is None:
+            chunksize = max(1, math.ceil(len(points)/(4*max_workers)))
+        chunks = [(i, points[i:i + chunksize]) for i in range(0, len(points), chunksize)]
+        start = time.perf_counter()
+        self.stats = {'points': 0, 'total': len(points), 'states': 0, 'records': 0}
+        results = [None]*len(chunks)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(_run_chunk, self.ds_dt, self.solver, self.initials, self.rule,
+                                       names, chunk, first, t_end, transient): i
+                       for i, (first, chunk) in enumerate(chunks)}
+            for future in as_completed(futures):
+                params, columns, stats = future.result()
+                results[futures[future]] = params, columns
+                self.__count(stats, len(columns[0]) if columns else 0, time.perf_counter() - start)
+                if progress is not None:
+                    progress(self.stats)
+        param_columns = [array('d') for _ in names]
+        record_columns = [array('d') for _ in self.rule.columns]
+        for params, columns in results:
+            for column, part in zip(param_columns, params):
+                column.extend(part)
+            for column, part in zip(record_columns, columns):
+                column.extend(part)
+        return _ve.vector({**dict(zip(names, param_columns)), **dict(zip(self.rule.columns, record_columns))})
+
+    def __count(self, stats: dict, records, elapsed):
+        s = self.stats
+        for k, v in stats.items():
+            if k != 'seconds':
+                s[k] = s.get(k, 0) + v
+        s['records'] += records
+        s['seconds'] = elapsed
+        s['points_per_second'] = s['points']/elapsed if elapsed else 0.0
+        s['states_per_second'] = s['states']/elapsed if elapsed else 0.0
@@ -1,51 +1,107 @@
-from diffeq.utils.vectors import vector
+import diffeq.utils.dual as _dual
+from diffeq.utils.vectors import vector, vector_function
 
-def jacobian(F, x: vector, h=None):
+def column_groups(sparsity: dict, in_axes) -> list[list]:
     """
-    Numerical Jacobian of vector function F at point x.
+    Input axes split into groups of structurally orthogonal columns: no output
+    depends on two axes of one group, so one perturbation of the whole group
+    gives all their columns. Greedy colouring, densest columns first.
+
+    `sparsity` maps every output axis to the input axes it depends on.
+    """
+    rows = {inp: {out for out, ins in sparsity.items() if inp in ins} for inp in in_axes}
+    groups = []
+    for inp in sorted(in_axes, key=lambda a: -len(rows[a])):
+        for axes, covered in groups:
+            if not rows[inp] & covered:
+                axes.append(inp)
+                covered |= rows[inp]
+                break
+        else:
+            groups.append(([inp], set(rows[inp])))
+    return [axes for axes, _ in groups]
+
+
+def jacobian(F, x: vector, h=None, method='central', sparsity=None):
+    """
+    Jacobian of vector function F at point x.
+
+    method='central' uses central differences, two evaluations of F per column.
+    method='dual' is exact forward mode: F is evaluated once per column on
+    dual numbers, so it must only use arithmetic, `vector` operations and the
+    `symbolic` functions (sin, cos, exp, sigmoid), not `math`.
+
+    With `sparsity` (output axis -> input axes it depends on, or True to take
+    it from `F.dependencies()` when F is a vector_function) columns are
+    grouped by `column_groups` and evaluated together, and only the
+    structurally non-zero entries are returned; absent keys read as 0.0.
+    Without it every entry is returned.
 
     Returns:
         vector: Keys are 'd{out}_d{in}' containing ∂F_out/∂x_in
     """
     in_axes = list(x.keys())
-    Fx = F(x)
-    out_axes = list(Fx.keys())
-    
-    # Adaptive step size if not provided
-    if h is None:
-        # Get typical magnitude of x values
-        magnitudes = [abs(float(v)) for v in x.values() if v != 0]
-        if magnitudes:
-            typical_x = max(magnitudes)
-            # Use relative step size, but ensure it's not too small
-            h_rel = 1e-6 * typical_x
-            # Absolute minimum step to avoid underflow
-            h_abs = max(1e-12, 1e-8 * typical_x) if typical_x > 0 else 1e-8
-            h = max(h_rel, h_abs)
-        else:
-            # All values are zero
-            h = 1e-8
-    
-    J = vector()
-    
-    for out in out_axes:
-        for inp in in_axes:
+    if sparsity is True:
+        if not isinstance(F, vector_function):
+            raise ValueError('sparsity=True needs a vector_function, pass the dependencies otherwise')
+        sparsity = F.dependencies()
+
+    if method == 'dual':
+        def column(group):
+            Fx = F(vector({k: _dual.dual(v, float(k in group)) for k, v in x.items()}))
+            return {out: _dual.tangent(v) for out, v in Fx.items()}
+    elif method == 'central':
+        # Adaptive step size if not provided
+        if h is None:
+            # Get typical magnitude of x values
+            magnitudes = [abs(float(v)) for v in x.values() if v != 0]
+            if magnitudes:
+                typical_x = max(magnitudes)
+                # Use relative step size, but ensure it's not too small
+                h_rel = 1e-6 * typical_x
+                # Absolute minimum step to avoid underflow
+                h_abs = max(1e-12, 1e-8 * typical_x) if typical_x > 0 else 1e-8
+                h = max(h_rel, h_abs)
+            else:
+                # All values are zero
+                h = 1e-8
+
+        # Protect against division by very small h
+        if abs(h) < 1e-15:
+            h = 1e-8  # Reset to safe minimum
+
+        # one pair of evaluations per group of columns
+        def column(group):
             x_forward = vector(x)
             x_backward = vector(x)
-            
-            x_forward[inp] += h
-            x_backward[inp] -= h
-            
-            F_forward = F(x_forward)[out]
-            F_backward = F(x_backward)[out]
-            
-            # Protect against division by very small h
-            if abs(h) < 1e-15:
-                h = 1e-8  # Reset to safe minimum
-                
-            derivative = (F_forward - F_backward) / (2 * h)
-            J[f'd{out}_d{inp}'] = derivative
-    
+            for inp in group:
+                x_forward[inp] += h
+                x_backward[inp] -= h
+
+            F_forward = F(x_forward)
+            F_backward = F(x_backward)
+            return {out: (F_forward[out] - F_backward[out]) / (2 * h) for out in F_forward}
+    else:
+        raise ValueError(f"unknown method {method!r}, expected 'central' or 'dual'")
+
+    J = vector()
+    if sparsity is None:
+        columns = {inp: column((inp,)) for inp in in_axes}
+        out_axes = list(columns[in_axes[0]]) if in_axes else list(F(x).keys())
+        for out in out_axes:
+            for inp in in_axes:
+                J[f'd{out}_d{inp}'] = columns[inp].get(out, 0.0)
+    else:
+        columns = {}
+        for group in column_groups(sparsity, in_axes):
+            values = column(set(group))
+            for inp in group:
+                columns[inp] = values
+        for out, ins in sparsity.items():
+            for inp in in_axes:
+                if inp in ins:
+                    J[f'd{out}_d{inp}'] = columns[inp].get(out, 0.0)
+
     return J
 
 
@@ -0,0 +1,127 @@
+"""
+Dual numbers a + b·ε with ε² = 0 for forward-mode differentiation.
+
+Evaluating a function on `dual(x, 1.0)` gives its value in `a` and its
+exact derivative by x in `b`. The functions below accept plain numbers
+and duals alike.
+"""
+import math
+
+
+class dual:
+    __slots__ = ('a', 'b')
+
+    def __init__(self, a, b=0.0):
+        self.a = a
+        self.b = b
+
+    def __repr__(self):
+        return f'dual({self.a!r}, {self.b!r})'
+
+    def __add__(self, o):
+        if isinstance(o, dual):
+            return dual(self.a + o.a, self.b + o.b)
+        return dual(self.a + o, self.b)
+
+    __radd__ = __add__
+
+    def __sub__(self, o):
+        if isinstance(o, dual):
+            return dual(self.a - o.a, self.b - o.b)
+        return dual(self.a - o, self.b)
+
+    def __rsub__(self, o):
+        return dual(o - self.a, -self.b)
+
+    def __mul__(self, o):
+        if isinstance(o, dual):
+            return dual(self.a*o.a, self.b*o.a + self.a*o.b)
+        return dual(self.a*o, self.b*o)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, o):
+        if isinstance(o, dual):
+            return dual(self.a/o.a, (self.b*o.a - self.a*o.b)/(o.a*o.a))
+        return dual(self.a/o, self.b/o)
+
+    def __rtruediv__(self, o):
+        return dual(o/self.a, -o*self.b/(self.a*self.a))
+
+    def __neg__(self):
+        return dual(-self.a, -self.b)
+
+    def __pos__(self):
+        return self
+
+    def __abs__(self):
+        return -self if self.a < 0 else self
+
+    def __pow__(self, n):
+        if isinstance(n, dual):
+            return exp(n*log(self))
+        if n == 0:
+            return dual(self.a**0, 0.0)
+        return dual(self.a**n, n*self.a**(n - 1)*self.b)
+
+    def __rpow__(self, base):
+        v = base**self.a
+        return dual(v, v*math.log(base)*self.b)
+
+    def __eq__(self, o):
+        return self.a == (o.a if isinstance(o, dual) else o)
+
+    def __lt__(self, o):
+        return self.a < (o.a if isinstance(o, dual) else o)
+
+    def __le__(self, o):
+        return self.a <= (o.a if isinstance(o, dual) else o)
+
+    def __gt__(self, o):
+        return self.a > (o.a if isinstance(o, dual) else o)
+
+    def __ge__(self, o):
+        return self.a >= (o.a if isinstance(o, dual) else o)
+
+    __hash__ = None
+
+
+def value(x):
+    return x.a if isinstance(x, dual) else x
+
+
+def tangent(x):
+    return x.b if isinstance(x, dual) else 0.0
+
+
+def sin(x):
+    if isinstance(x, dual):
+        return dual(math.sin(x.a), math.cos(x.a)*x.b)
+    return math.sin(x)
+
+
+def cos(x):
+    if isinstance(x, dual):
+        return dual(math.cos(x.a), -math.sin(x.a)*x.b)
+    return math.cos(x)
+
+
+def exp(x):
+    if isinstance(x, dual):
+        v = math.exp(x.a)
+        return dual(v, v*x.b)
+    return math.exp(x)
+
+
+def log(x):
+    if isinstance(x, dual):
+        return dual(math.log(x.a), x.b/x.a)
+    return math.log(x)
+
+
+def sigmoid(x):
+    return 1/(1 + exp(-x))
+
+
+# replacements for the math functions of compiled programs, see program.compile
+functions = {'cos': cos, 'sin': sin, 'exp': exp}
@@ -0,0 +1,198 @@
+"""
+Small dense linear algebra on lists of rows, enough for the Newton
+iterations of the implicit integrators (a few to a few dozen unknowns).
+"""
+
+
+def identity(n) -> list[list[float]]:
+    return [[float(i == j) for j in range(n)] for i in range(n)]
+
+
+def lu_factor(A) -> tuple[list[list[float]], list[int]]:
+    """
+    LU decomposition with partial pivoting of a square matrix given as rows.
+    Returns (LU, perm): L below the diagonal (unit diagonal implied) and U on
+    and above it, stored in one matrix, and the row permutation. `A` is not changed.
+    """
+    n = len(A)
+    lu = [list(map(float, row)) for row in A]
+    perm = list(range(n))
+    for k in range(n):
+        p = max(range(k, n), key=lambda i: abs(lu[i][k]))
+        if lu[p][k] == 0.0:
+            raise ZeroDivisionError('singular matrix')
+        if p != k:
+            lu[k], lu[p] = lu[p], lu[k]
+            perm[k], perm[p] = perm[p], perm[k]
+        row_k = lu[k]
+        pivot = row_k[k]
+        for i in range(k + 1, n):
+            row = lu[i]
+            if row[k] != 0.0:
+                m = row[k]/pivot
+                row[k] = m
+                for j in range(k + 1, n):
+                    row[j] -= m*row_k[j]
+    return lu, perm
+
+
+def lu_solve(factor, b) -> list[float]:
+    """Solution x of A x = b from the `lu_factor` of A."""
+    lu, perm = factor
+    n = len(lu)
+    y = [b[p] for p in perm]
+    for i in range(n):
+        row = lu[i]
+        y[i] -= sum(row[j]*y[j] for j in range(i))
+    for i in range(n - 1, -1, -1):
+        row = lu[i]
+        y[i] = (y[i] - sum(row[j]*y[j] for j in range(i + 1, n)))/row[i]
+    return y
+
+
+def hessenberg(A) -> list[list[float]]:
+    """Upper Hessenberg matrix similar to A (Gaussian elimination with pivoting). `A` is not changed."""
+    n = len(A)
+    h = [list(map(float, row)) for row in A]
+    for k in range(1, n - 1):
+        p = max(range(k, n), key=lambda i: abs(h[i][k - 1]))
+        pivot = h[p][k - 1]
+        if pivot == 0.0:
+            continue
+        if p != k:
+            h[k], h[p] = h[p], h[k]
+            for row in h:
+                row[k], row[p] = row[p], row[k]
+        for i in range(k + 1, n):
+            m = h[i][k - 1]/pivot
+            if m != 0.0:
+                row_i, row_k = h[i], h[k]
+                for j in range(k - 1, n):
+                    row_i[j] -= m*row_k[j]
+                for row in h:
+                    row[k] += m*row[i]
+    return h
+
+
+def eigenvalues(A, max_iterations=60) -> list[complex]:
+    """
+    Eigenvalues of a real square matrix, by the Francis double shift QR
+    iteration on its Hessenberg form, complex conjugate pairs next to each
+    other. Raises ArithmeticError when an eigenvalue does not converge
+    within `max_iterations` iterations.
+    """
+    a = hessenberg(A)
+    n = len(a)
+    norm = sum(abs(v) for row in a for v in row)
+    w = [0j]*n
+    nn = n - 1
+    t = 0.0
+    while nn >= 0:
+        its = 0
+        while True:
+            # small subdiagonal element splits the matrix
+            l = nn
+            while l >= 1:
+                s = abs(a[l - 1][l - 1]) + abs(a[l][l])
+                if s == 0.0:
+                    s = norm
+                if abs(a[l][l - 1]) <= 2.2e-16*s:
+                    a[l][l - 1] = 0.0
+                    break
+                l -= 1
+            x = a[nn][nn]
+            if l == nn:
+                w[nn] = complex(x + t)
+                nn -= 1
+                break
+            y = a[nn - 1][nn - 1]
+            ww = a[nn][nn - 1]*a[nn - 1][nn]
+            if l == nn - 1:
+                # 2x2 block: a real pair or a complex conjugate pair
+                p = 0.5*(y - x)
+                q = p*p + ww
+                z = abs(q)**0.5
+                x += t
+                if q >= 0.0:
+                    z = p + (z if p >= 0 else -z)
+                    w[nn - 1] = w[nn] = complex(x + z)
+                    if z != 0.0:
+                        w[nn] = complex(x - ww/z)
+                else:
+                    w[nn - 1] = complex(x + p, z)
+                    w[nn] = complex(x + p, -z)
+                nn -= 2
+                break
+            if its == max_iterations:
+                raise ArithmeticError('eigenvalues did not converge')
+            if its in (10, 20):
+                # exceptional shift
+                t += x
+                for i in range(nn + 1):
+                    a[i][i] -= x
+                s = abs(a[nn][nn - 1]) + abs(a[nn - 1][nn - 2])
+                y = x = 0.75*s
+                ww = -0.4375*s*s
+            its += 1
+            m = nn - 2
+            while m >= l:
+                z = a[m][m]
+                r = x - z
+                s = y - z
+                p = (r*s - ww)/a[m + 1][m] + a[m][m + 1]
+                q = a[m + 1][m + 1] - z - r - s
+                r = a[m + 2][m + 1]
+                s = abs(p) + abs(q) + abs(r)
+                p, q, r = p/s, q/s, r/s
+                if m == l:
+                    break
+                u = abs(a[m][m - 1])*(abs(q) + abs(r))
+                v = abs(p)*(abs(a[m - 1][m - 1]) + abs(z) + abs(a[m + 1][m + 1]))
+                if u <= 2.2e-16*v:
+                    break
+                m -= 1
+            for i in range(m + 2, nn + 1):
+                a[i][i - 2] = 0.0
+                if i != m + 2:
+                    a[i][i - 3] = 0.0
+            k = m
+            while k <= nn - 1:
+                if k != m:
+                    p = a[k][k - 1]
+                    q = a[k + 1][k - 1]
+                    r = a[k + 2][k - 1] if k != nn - 1 else 0.0
+                    x = abs(p) + abs(q) + abs(r)
+                    if x != 0.0:
+                        p, q, r = p/x, q/x, r/x
+                s = (p*p + q*q + r*r)**0.5
+                if p < 0:
+                    s = -s
+                if s != 0.0:
+                    if k == m:
+                        if l != m:
+                            a[k][k - 1] = -a[k][k - 1]
+                    else:
+                        a[k][k - 1] = -s*x
+                    p += s
+                    x = p/s
+                    y = q/s
+                    z = r/s
+                    q /= p
+                    r /= p
+                    for j in range(k, nn + 1):
+                        p = a[k][j] + q*a[k + 1][j]
+                        if k != nn - 1:
+                            p += r*a[k + 2][j]
+                            a[k + 2][j] -= p*z
+                        a[k + 1][j] -= p*y
+                        a[k][j] -= p*x
+                    mmin = nn if nn < k + 3 else k + 3
+                    for i in range(l, mmin + 1):
+                        p = x*a[i][k] + y*a[i][k + 1]
+                        if k != nn - 1:
+                            p += z*a[i][k + 2]
+                            a[i][k + 2] -= p*r
+                        a[i][k + 1] -= p*q
+                        a[i][k] -= p
+                k += 1
+    return w
@@ -1,6 +1,6 @@
 def get_table_basic(heads, content, sep='|'):
     S = []
-    head_lenghts = [max(map(len, (c[i] for c in content))) + len(h) for i, h in enumerate(heads)]
+    head_lenghts = [max(map(len, (c[i] for c in content)), default=0) + len(h) for i, h in enumerate(heads)]
     W = sep.join(["_"*(sum(head_lenghts) + len(sep)*(len(heads)) - 1)])
     S.append(' ' + W)
     S.append(sep + sep.join([*(h + " "*(head_lenghts[i] - len(h)) for i, h in enumerate(heads))]) + sep)
@@ -13,7 +13,7 @@ def get_table_basic(heads, content, sep='|'):
 
 def get_table(heads, content, sep='│'):
     S = []
-    head_lengths = [max(map(len, (c[i] for c in content))) + len(h) for i, h in enumerate(heads)]
+    head_lengths = [max(map(len, (c[i] for c in content)), default=0) + len(h) for i, h in enumerate(heads)]
     W = '─' * (sum(head_lengths) + len(sep) * (len(heads)) - 1)
     S.append('┌' + W + '┐')
     S.append(sep + sep.join([*(h + " " * (head_lengths[i] - len(h)) for i, h in enumerate(heads))]) + sep)
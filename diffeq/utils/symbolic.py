@@ -1,5 +1,9 @@
+import copy as _copy
+import functools
 import math
 
+import diffeq.utils.dual as _dual
+
 
 def str_sum(*array, sep=''):
     return sep.join(str(a) for a in array)
@@ -9,13 +13,39 @@ def to_node(b):
     return b if isinstance(b, __node) else const(b)
 
 
+def is_node(b) -> bool:
+    return isinstance(b, __node)
+
+
+def is_zero(node) -> bool:
+    return type(node) == const and node.v == 0
+
+
 class __node:
     def __init__(self, name="none_name", *parents, value=0.0) -> None:
         self.p: list['__node'] = [*parents]
         self.name = name
         self.v = value
 
-    def diff(self, param_name) -> '__node':
+    def diff(self, param_name, cache=None) -> '__node':
+        """
+        Derivative by the variable `param_name`. Every node is differentiated
+        once per variable: results are kept in `cache` by node identity, so
+        shared subexpressions share their derivatives. Pass the same dict to
+        differentiate several expressions of one graph (Jacobian entries).
+        """
+        if cache is None:
+            cache = {}
+        key = (id(self), param_name)
+        if key not in cache:
+            # parents first, so the rules only look up their derivatives and
+            # deep expressions do not recurse; the node is kept alive with
+            # its derivative so that its id is not reused
+            for node in topological_order([self], lambda n: (id(n), param_name) in cache):
+                cache[(id(node), param_name)] = (node, node.derivative(param_name, cache))
+        return cache[key][1]
+
+    def derivative(self, param_name, cache) -> '__node':
         return const(float(param_name == self.name))
 
     def get_value(self):
@@ -63,53 +93,73 @@ class __node:
         return pow_node(self, b)
 
     def __eq__(self, b: '__node') -> bool:
-        if type(self) == type(b) and self.name == b.name and self.v == b.v:
-            if not (j := (len(b.p) == len(self.p))):
+        # structural equality walked with an explicit stack, every pair of
+        # nodes is compared once, so deep and shared expressions are fine
+        stack = [(self, b)]
+        seen = set()
+        while stack:
+            x, y = stack.pop()
+            if x is y or (id(x), id(y)) in seen:
+                continue
+            seen.add((id(x), id(y)))
+            if not (type(x) == type(y) and x.name == y.name and x.v == y.v and len(x.p) == len(y.p)):
                 return False
-            i = 0
-            while i < len(self.p) and (j := (j and (self.p[i] is b.p[i]))):
-                i += 1
-            return j or self.p == b.p
-        else:
-            return False
+            stack += zip(x.p, y.p)
+        return True
 
     def __ne__(self, b: '__node') -> bool:
         return not (self == b)
 
-    def get_optim_p(self):
-        k = [p.optim() for p in self.p]
+    def get_optim_p(self, cache=None):
+        k = [p.optim(cache) for p in self.p]
         while None in k:
             k.remove(None)
         return k
 
-    def optim(self):
-        self.p = self.get_optim_p()
+    def optim(self, cache=None):
+        """
+        Simplified node (None for an empty or zero expression); parents are
+        rewritten in place. Like `diff`, every node is simplified once per
+        `cache`, so shared subexpressions are not walked again.
+        """
+        if cache is None:
+            cache = {}
+        if id(self) not in cache:
+            # parents first, as in `diff`
+            for node in topological_order([self], lambda n: id(n) in cache):
+                cache[id(node)] = (node, node.simplify(cache))
+        return cache[id(self)][1]
+
+    def simplify(self, cache) -> '__node':
+        self.p = self.get_optim_p(cache)
         return self
 
     def get_deep(self) -> list[list['__node']]:
-        dd = {}
-        self.__deep__(dd)
-        l = [[] for _ in range(max(dd.keys()) if dd else 0)]
-        for i in range(len(dd)):
-            l[i] = dd[i + 1]
-            h = []
-            for j in l[i]:
-                if not sum([i is j for i in h]):
-                    h.append(j)
-            l[i] = h
-        return l
-
-    def __deep__(self, deep_dict):
-        deep = max((p.__deep__(deep_dict) for p in self.p), default=0) + 1
-        if deep in deep_dict:
-            deep_dict[deep].append(self)
-        else:
-            deep_dict[deep] = [self]
-        return deep
+        """Nodes of the expression grouped by depth, see `layers`."""
+        return layers([self])
 
     def update_value(self):
         pass
 
+    def backward(self, g) -> list:
+        """Adjoints of the parents given the adjoint `g` of this node, after `update_value`."""
+        return []
+
+    def get_code(self, *args) -> str:
+        raise NotImplementedError(f'{type(self).__name__} can not be compiled')
+
+    def get_taylor_code(self, o, *args) -> tuple[list[str], list[str]]:
+        """
+        Statements for `program.get_taylor_source`: before the loop over the
+        orders and inside it, appending coefficient `_k` to the list `o` from
+        the coefficient lists `args` of the parents.
+        """
+        raise NotImplementedError(f'{type(self).__name__} has no Taylor rule')
+
+    def get_key(self) -> tuple:
+        """Structural key: equal for nodes computing the same thing from the same parent objects."""
+        return (type(self), self.name, *map(id, self.p))
+
     def replace_is_parent_nodes(self, old, new):
         k = []
         for p in self.p:
@@ -148,12 +198,8 @@ class variable(__node):
     def __init__(self, name="none_name", value=0) -> None:
         super().__init__(name=name, value=value)
 
-    def __deep__(self, deep_dict):
-        if 1 in deep_dict:
-            deep_dict[1].append(self)
-        else:
-            deep_dict[1] = [self]
-        return 1
+    def get_key(self) -> tuple:
+        return (type(self), self.name)
 
 
 class const(variable):
@@ -199,6 +245,12 @@ class const(variable):
     def __str__(self) -> str:
         return str(self.v)
 
+    def get_code(self) -> str:
+        return f"({self.v!r})"
+
+    def get_key(self) -> tuple:
+        return (type(self), type(self.v), self.v)
+
     def __neg__(self) -> '__node':
         return const(-self.v)
 
@@ -222,8 +274,10 @@ class add(__node):
     def __init__(self, *parents) -> None:
         super().__init__("add_node", *parents)
 
-    def diff(self, param_name) -> 'add':
-        return add(*[n.diff(param_name) for n in self.p])
+    def derivative(self, param_name, cache) -> '__node':
+        d = [n.diff(param_name, cache) for n in self.p]
+        d = [k for k in d if not is_zero(k)]
+        return add(*d) if d else const(0.0)
 
     def get_value(self):
         return sum(i.get_value() for i in self.p)
@@ -231,6 +285,15 @@ class add(__node):
     def update_value(self):
         self.v = sum(i.v for i in self.p)
 
+    def backward(self, g):
+        return [g]*len(self.p)
+
+    def get_code(self, *args) -> str:
+        return f"({'+'.join(args)})" if args else '0.0'
+
+    def get_taylor_code(self, o, *args):
+        return [], [f"{o}.append({'+'.join(f'{a}[_k]' for a in args) or '0.0'})"]
+
     def __str__(self) -> str:
         if len(self.p) == 0:
             return "0"
@@ -244,7 +307,7 @@ class add(__node):
             f = 0
             h = []
             for j in self.p:
-                if j == p:
+                if j is p:
                     f += 1
                 else:
                     h.append(j)
@@ -262,17 +325,17 @@ class add(__node):
         if v != 0:
             self.p.append(const(v))
 
-    def optim(self):
-        self.p = self.get_optim_p()
+    def simplify(self, cache):
+        self.p = self.get_optim_p(cache)
         self.__optim_local_func__()
         k = []
         for p in self.p:
-            if not (p == None or (type(p) == const and p.v == 0)):
+            if not (p is None or (type(p) == const and p.v == 0)):
                 if type(p) == add:
-                    k += p.get_optim_p()
+                    k += p.get_optim_p(cache)
                 else:
-                    j = p.optim()
-                    if j != None:
+                    j = p.optim(cache)
+                    if j is not None:
                         k.append(j)
         self.p = k
         self.__optim_consts()
@@ -292,8 +355,12 @@ class mul(__node):
     def __init__(self, *parents) -> None:
         super().__init__("mul_node", *parents)
 
-    def diff(self, param_name) -> 'add':
-        return add(*[mul(*[k.diff(param_name) if i == j else k for j, k in enumerate(self.p)]) for i, n in enumerate(self.p)])
+    def derivative(self, param_name, cache) -> '__node':
+        # product rule, terms of factors with zero derivative are left out
+        d = [k.diff(param_name, cache) for k in self.p]
+        terms = [mul(*self.p[:i], dk, *self.p[i + 1:])
+                 for i, dk in enumerate(d) if not is_zero(dk)]
+        return add(*terms) if terms else const(0.0)
 
     def get_value(self):
         o = 1
@@ -306,6 +373,46 @@ class mul(__node):
         for i in self.p:
             self.v *= i.v
 
+    def backward(self, g):
+        # products of the other factors from prefix and suffix products, no division
+        right = [1]*(len(self.p) + 1)
+        for i in range(len(self.p) - 1, -1, -1):
+            right[i] = right[i + 1]*self.p[i].v
+        out = []
+        for i, p in enumerate(self.p):
+            out.append(g*right[i + 1])
+            g = g*p.v
+        return out
+
+    def get_code(self, *args) -> str:
+        return f"({'*'.join(args)})" if args else '1.0'
+
+    def get_taylor_code(self, o, *args):
+        # constant factors scale, the others are multiplied by Cauchy products
+        scale = 1.0
+        factors = []
+        for p, a in zip(self.p, args):
+            if type(p) is const:
+                scale *= p.v
+            else:
+                factors.append(a)
+        if not factors:
+            return [], [f'{o}.append({scale!r} if _k == 0 else 0.0)']
+        if len(factors) == 1:
+            return [], [f'{o}.append({scale!r}*{factors[0]}[_k])']
+        before, loop = [], []
+        a = factors[0]
+        for i, b in enumerate(factors[1:]):
+            last = i == len(factors) - 2
+            t = o if last and scale == 1.0 else f'{o}_{i}'
+            if t != o:
+                before.append(f'{t} = []')
+            loop.append(f'{t}.append(sum({a}[_j]*{b}[_k - _j] for _j in range(_k + 1)))')
+            a = t
+        if a != o:
+            loop.append(f'{o}.append({scale!r}*{a}[_k])')
+        return before, loop
+
     def __str__(self) -> str:
         return f"{str_sum(*self.p, sep='*')}"
 
@@ -329,14 +436,18 @@ class mul(__node):
             f = 0
             h = []
             for j in self.p:
-                if j == p:
+                if j is p:
                     f += 1
                 else:
                     h.append(j)
             self.p = h + ([p**f] if f > 1 else ([] if f == 0 else [p]))
 
-    def optim(self):
-        self.p = self.get_optim_p()
+    def simplify(self, cache):
+        k = [p.optim(cache) for p in self.p]
+        if None in k:
+            # a factor optimised away is zero
+            return None
+        self.p = k
         self.__optim_local_func__()
         k = []
         NEGAT = 0
@@ -344,12 +455,14 @@ class mul(__node):
             if (type(p) == const and p.v == 0):
                 return None
 
-            if not (p == None or (type(p) == const and p.v == 1)):
+            if not (p is None or (type(p) == const and p.v == 1)):
                 if type(p) == mul:
-                    k += p.get_optim_p()
+                    k += p.p
                 else:
-                    j = p.optim()
-                    if j != None:
+                    j = p.optim(cache)
+                    if j is None:
+                        return None
+                    else:
                         if type(j) == negative:
                             k.append(to_node(-1))
                             k.append(j.p[0])
@@ -366,7 +479,7 @@ class mul(__node):
                 return self
         else:
             if l == 0:
-                return None
+                return const(1)
             if l == 1:
                 if NEGAT % 2:
                     return negative(self.p[0])
@@ -384,8 +497,18 @@ class negative(__node):
     def update_value(self):
         self.v = -self.p[0].v
 
-    def diff(self, param_name) -> '__node':
-        return negative(self.p[0].diff(param_name))
+    def backward(self, g):
+        return [-g]
+
+    def get_code(self, a) -> str:
+        return f"(-{a})"
+
+    def get_taylor_code(self, o, a):
+        return [], [f'{o}.append(-{a}[_k])']
+
+    def derivative(self, param_name, cache) -> '__node':
+        d = self.p[0].diff(param_name, cache)
+        return const(0.0) if is_zero(d) else negative(d)
 
     def __str__(self) -> str:
         return f"(-{str(self.p[0])})"
@@ -399,57 +522,109 @@ class negative(__node):
     def replace_eq_parent_node(self, new):
         return self.p[0].replace_eq_parent_node(new)
 
-    def optim(self):
+    def simplify(self, cache):
+        super().simplify(cache)
         if len(self.p) == 0:
             return None
         if type(self.p[0]) == const:
             return const(-self.p[0].v)
-        return super().optim()
+        return self
+
+class unary(__node):
+    """Function of one node. Applied to a number (or a dual number) it is evaluated right away."""
+    numeric = None
+
+    def __new__(cls, *args):
+        if args and not is_node(args[0]):
+            return cls.numeric(args[0])
+        return super().__new__(cls)
+
+
+class cos(unary):
+    numeric = staticmethod(_dual.cos)
 
-class cos(__node):
     def __init__(self, parent) -> None:
         super().__init__("cos_node", parent)
 
-    def diff(self, param_name) -> '__node':
-        return mul(negative(sin(self.p[0])), self.p[0].diff(param_name))
+    def derivative(self, param_name, cache) -> '__node':
+        d = self.p[0].diff(param_name, cache)
+        return const(0.0) if is_zero(d) else mul(negative(sin(self.p[0])), d)
 
     def get_value(self):
-        return math.cos(self.p[0].get_value())
+        return _dual.cos(self.p[0].get_value())
 
     def update_value(self):
-        self.v = math.cos(self.p[0].v)
+        self.v = _dual.cos(self.p[0].v)
+
+    def backward(self, g):
+        return [-g*math.sin(self.p[0].v)]
+
+    def get_code(self, a) -> str:
+        return f"cos({a})"
+
+    def get_taylor_code(self, o, a):
+        # cos' = -sin a', sin' = cos a'
+        return [f'{o}s = []'], [
+            f'{o}.append(cos({a}[0]) if _k == 0 else -sum(_j*{a}[_j]*{o}s[_k - _j] for _j in range(1, _k + 1))/_k)',
+            f'{o}s.append(sin({a}[0]) if _k == 0 else sum(_j*{a}[_j]*{o}[_k - _j] for _j in range(1, _k + 1))/_k)']
 
     def __str__(self) -> str:
         return f"cos({str(self.p[0])})"
 
-class sin(__node):
+class sin(unary):
+    numeric = staticmethod(_dual.sin)
+
     def __init__(self, parent) -> None:
         super().__init__("sin_node", parent)
 
-    def diff(self, param_name) -> '__node':
-        return mul(cos(self.p[0]), self.p[0].diff(param_name))
+    def derivative(self, param_name, cache) -> '__node':
+        d = self.p[0].diff(param_name, cache)
+        return const(0.0) if is_zero(d) else mul(cos(self.p[0]), d)
 
     def get_value(self):
-        return math.sin(self.p[0].get_value())
+        return _dual.sin(self.p[0].get_value())
 
     def update_value(self):
-        self.v = math.sin(self.p[0].v)
+        self.v = _dual.sin(self.p[0].v)
+
+    def backward(self, g):
+        return [g*math.cos(self.p[0].v)]
+
+    def get_code(self, a) -> str:
+        return f"sin({a})"
+
+    def get_taylor_code(self, o, a):
+        return [f'{o}c = []'], [
+            f'{o}.append(sin({a}[0]) if _k == 0 else sum(_j*{a}[_j]*{o}c[_k - _j] for _j in range(1, _k + 1))/_k)',
+            f'{o}c.append(cos({a}[0]) if _k == 0 else -sum(_j*{a}[_j]*{o}[_k - _j] for _j in range(1, _k + 1))/_k)']
 
     def __str__(self) -> str:
         return f"sin({str(self.p[0])})"
 
-class exp(__node):
+class exp(unary):
+    numeric = staticmethod(_dual.exp)
+
     def __init__(self, parent) -> None:
         super().__init__("exp_node", parent)
 
-    def diff(self, param_name) -> '__node':
-        return mul(exp(self.p[0]), self.p[0].diff(param_name))
+    def derivative(self, param_name, cache) -> '__node':
+        d = self.p[0].diff(param_name, cache)
+        return const(0.0) if is_zero(d) else mul(self, d)
 
     def get_value(self):
-        return math.exp(self.p[0].get_value())
+        return _dual.exp(self.p[0].get_value())
 
     def update_value(self):
-        self.v = math.exp(self.p[0].v)
+        self.v = _dual.exp(self.p[0].v)
+
+    def backward(self, g):
+        return [g*self.v]
+
+    def get_code(self, a) -> str:
+        return f"exp({a})"
+
+    def get_taylor_code(self, o, a):
+        return [], [f'{o}.append(exp({a}[0]) if _k == 0 else sum(_j*{a}[_j]*{o}[_k - _j] for _j in range(1, _k + 1))/_k)']
 
     def __str__(self) -> str:
         return f"exp({str(self.p[0])})"
@@ -458,10 +633,12 @@ class reverse(__node):
     def __init__(self, parent) -> None:
         super().__init__("reverse_node", parent)
 
-    def diff(self, param_name) -> '__node':
-        return mul(negative(reverse(mul(*self.p*2))), self.p[0].diff(param_name))
+    def derivative(self, param_name, cache) -> '__node':
+        d = self.p[0].diff(param_name, cache)
+        return const(0.0) if is_zero(d) else mul(negative(pow_node(self, 2)), d)
 
-    def optim(self):
+    def simplify(self, cache):
+        super().simplify(cache)
         if type(self.p[0]) == const:
             return const(1/self.p[0].v)
 
@@ -475,23 +652,47 @@ class reverse(__node):
     def update_value(self):
         self.v = 1/self.p[0].v
 
+    def backward(self, g):
+        return [-g*self.v*self.v]
+
+    def get_code(self, a) -> str:
+        return f"(1/{a})"
+
+    def get_taylor_code(self, o, a):
+        # from a*r = 1
+        return [], [f'{o}.append(((1.0 if _k == 0 else 0.0) - sum({a}[_j]*{o}[_k - _j] for _j in range(1, _k + 1)))/{a}[0])']
+
     def __str__(self) -> str:
         return f"(1/{str(self.p[0])})"
 
 
-class sigmoid(__node):
+class sigmoid(unary):
+    numeric = staticmethod(_dual.sigmoid)
+
     def __init__(self, parent) -> None:
         super().__init__("sigmoid_node", parent)
 
-    def diff(self, param_name) -> '__node':
-        q = sigmoid(self.p[0])
-        return mul(q, add(to_node(1), negative(q)), self.p[0].diff(param_name))
+    def derivative(self, param_name, cache) -> '__node':
+        d = self.p[0].diff(param_name, cache)
+        return const(0.0) if is_zero(d) else mul(self, add(to_node(1), negative(self)), d)
 
     def get_value(self):
-        return 1/(1+math.exp(-self.p[0].get_value()))
+        return 1/(1+_dual.exp(-self.p[0].get_value()))
 
     def update_value(self):
-        self.v = 1/(1+math.exp(-self.p[0].v))
+        self.v = 1/(1+_dual.exp(-self.p[0].v))
+
+    def backward(self, g):
+        return [g*self.v*(1 - self.v)]
+
+    def get_code(self, a) -> str:
+        return f"(1/(1+exp(-{a})))"
+
+    def get_taylor_code(self, o, a):
+        # q' = u a' with u = q(1 - q)
+        return [f'{o}u = []'], [
+            f'{o}.append(1/(1 + exp(-{a}[0])) if _k == 0 else sum(_j*{a}[_j]*{o}u[_k - _j] for _j in range(1, _k + 1))/_k)',
+            f'{o}u.append({o}[_k] - sum({o}[_j]*{o}[_k - _j] for _j in range(_k + 1)))']
 
     def __str__(self) -> str:
         return f"q({str(self.p[0])})"
@@ -516,15 +717,48 @@ class pow_node(__node):
     def update_value(self):
         self.v = pow(self.p[0].v, self.n)
 
-    def diff(self, param_name) -> '__node':
-        return self.n * pow_node(self.p[0], self.n - 1) * self.p[0].diff(param_name)
-
-    def optim(self):
+    def backward(self, g):
+        return [g*self.n*pow(self.p[0].v, self.n - 1)]
+
+    def get_code(self, a) -> str:
+        return f"({a}**{self.n!r})"
+
+    def get_taylor_code(self, o, a):
+        n = self.n
+        if n == int(n) and n > 0:
+            # repeated Cauchy products, also right where the base is zero
+            if n == 1:
+                return [], [f'{o}.append({a}[_k])']
+            before, loop, b = [], [], a
+            for i in range(int(n) - 1):
+                t = o if i == int(n) - 2 else f'{o}_{i}'
+                if t != o:
+                    before.append(f'{t} = []')
+                loop.append(f'{t}.append(sum({b}[_j]*{a}[_k - _j] for _j in range(_k + 1)))')
+                b = t
+            return before, loop
+        # from a*p' = n*a'*p
+        return [], [f'{o}.append({a}[0]**{n!r} if _k == 0 else '
+                    f'sum(({n + 1!r}*_j - _k)*{a}[_j]*{o}[_k - _j] for _j in range(1, _k + 1))/(_k*{a}[0]))']
+
+    def derivative(self, param_name, cache) -> '__node':
+        d = self.p[0].diff(param_name, cache)
+        return const(0.0) if is_zero(d) else self.n * pow_node(self.p[0], self.n - 1) * d
+
+    def get_key(self) -> tuple:
+        return (*super().get_key(), self.n)
+
+    def simplify(self, cache):
+        if self.n == 0:
+            return const(1)
+        super().simplify(cache)
+        if len(self.p) == 0:
+            return None
         if self.n == 1:
             return self.p[0]
-        if self.p[0] == const:
+        if type(self.p[0]) == const:
             return const(pow(self.p[0].get_value(), self.n))
-        return super().optim()
+        return self
 
     def __str__(self) -> str:
         return f"({str(self.p[0])}^{self.n})"
@@ -535,57 +769,342 @@ class pow_node(__node):
         return super().__mul__(b)
 
 
-def hsum(*lists):
-    if len(lists) <= 1:
-        return lists[0]
-    o = lists[0]
-    for a in lists[1:]:
-        for nl in range(len(o)):
-            if nl < len(a):
-                o[nl] += a[nl]
-            else:
-                break  # Prevent out-of-range access
-    return o
+def topological_order(roots, done=None) -> list['__node']:
+    """
+    Every node reachable from `roots` exactly once, parents before children,
+    with an explicit stack: linear in the size of the graph and no recursion
+    limit on deep expressions. Nodes for which `done(node)` is true are
+    neither listed nor walked through.
+    """
+    order = []
+    visited = set()
+    stack = [(r, False) for r in roots]
+    while stack:
+        node, expanded = stack.pop()
+        if expanded:
+            order.append(node)
+        elif id(node) not in visited:
+            visited.add(id(node))
+            if done is not None and done(node):
+                continue
+            stack.append((node, True))
+            stack += [(p, False) for p in reversed(node.p) if id(p) not in visited]
+    return order
+
+
+def layers(roots) -> list[list['__node']]:
+    """
+    Nodes reachable from `roots` grouped by depth: variables and constants
+    first, every node one layer after its deepest parent. One pass over
+    `topological_order`.
+    """
+    depth = {}
+    out = []
+    for node in topological_order(roots):
+        d = max((depth[id(p)] for p in node.p), default=-1) + 1
+        depth[id(node)] = d
+        if d == len(out):
+            out.append([])
+        out[d].append(node)
+    return out
+
+
+def hash_cons(roots, copy=False) -> list['__node']:
+    """
+    Common subexpression elimination in one pass: every structurally identical
+    node reachable from `roots` is replaced by a single instance, found by its
+    key in a hash table. Parents are canonical before their children are
+    looked up, so keys only compare parent identities.
+
+    With `copy=True` the input nodes are left untouched and fresh nodes are
+    returned, otherwise parent lists are rewritten in place.
+    Returns the canonical roots.
+    """
+    canonical = {}
+    replaced = {}
+    for node in topological_order(roots):
+        new = _copy.copy(node) if copy else node
+        new.p = [replaced[id(p)] for p in node.p]
+        replaced[id(node)] = canonical.setdefault(new.get_key(), new)
+    return [replaced[id(r)] for r in roots]
+
+
+# functions visible to the generated code, bound as default arguments (locals)
+compiled_namespace = {'cos': math.cos, 'sin': math.sin, 'exp': math.exp}
 
 
 class program:
-    def __init__(self, code: dict[str, "__node"]) -> None:
-        self.c = code
+    def __init__(self, code: dict[str, "__node"], compiled=False, parameters: dict = None) -> None:
+        # the program works on its own copy, optimisations change nodes in place;
+        # the copy is hash-consed, so equal terms and factors are one object
+        # for the simplification rules and are found by identity
+        self.node_counts = {'before': len(topological_order(code.values()))}
+        self.c = dict(zip(code.keys(), hash_cons(code.values(), copy=True)))
+        cache = {}
         for key, c in self.c.items():
-            c.optim()
-        self.comp_layers = hsum(*[c.get_deep() for c in self.c.values()])
-        self.input_signature = {
-            node.name: node for layer in self.comp_layers for node in layer if isinstance(
-                node, variable) and type(node) is not const}
-        self.__consts = {
-            node.name: node for layer in self.comp_layers for node in layer if type(node) is const}
+            self.c[key] = c.optim(cache) or c
         self.remove_equal_nodes()
-        self.comp_layers = hsum(*[c.get_deep() for c in self.c.values()])
+        # flat evaluation order, parents before children
+        self.order = topological_order(self.c.values())
+        self.node_counts['after'] = len(self.order)
+        self.input_signature = {
+            node.name: node for node in self.order if isinstance(node, variable) and type(node) is not const}
+        self.__consts = {node.name: node for node in self.order if type(node) is const}
+        self.compiled = compiled
+        self.__compiled = {}
+        # variables that are not arguments of the generated code: their values are
+        # read from `parameter_values` at every call, see `bind`
+        parameters = {} if parameters is None else parameters
+        self.parameter_names: tuple = tuple(parameters)
+        self.parameter_values: list = [parameters[k] for k in self.parameter_names]
+
+    def __getstate__(self):
+        # generated functions can not be pickled, they are rebuilt on demand
+        state = self.__dict__.copy()
+        state['_program__compiled'] = {}
+        return state
+
+    @property
+    def parameters(self) -> dict:
+        return dict(zip(self.parameter_names, self.parameter_values))
+
+    def bind(self, **values) -> 'program':
+        """
+        Sets parameter values in place: compiled functions read them at every
+        call, nothing is rebuilt. Returns self.
+        """
+        for name, value in values.items():
+            if name not in self.parameter_names:
+                raise KeyError(f'{name!r} is not a parameter, parameters: {self.parameter_names}')
+            self.parameter_values[self.parameter_names.index(name)] = value
+        return self
 
+    def __bind_variables(self, values):
+        for name, value in zip(self.parameter_names, values):
+            if name in self.input_signature:
+                self.input_signature[name].v = value
 
     def __call__(self, **kwargs):
+        if self.compiled:
+            names = tuple(n for n in self.input_signature if n not in self.parameter_names)
+            values = [kwargs[n] if n in kwargs else self.input_signature[n].v for n in names]
+            parameters = [kwargs.get(n, v) for n, v in zip(self.parameter_names, self.parameter_values)]
+            return dict(zip(self.c.keys(), self.compile(names, parameters=parameters)(values)))
+        self.__bind_variables(self.parameter_values)
         for name, val in kwargs.items():
             if name in self.input_signature:
                 self.input_signature[name].v = val
         return self.run()
 
+    @property
+    def comp_layers(self) -> list[list['__node']]:
+        """The nodes grouped by depth, see `layers`."""
+        return layers(self.c.values())
+
     def run(self) -> dict[str, any]:
-        for j in self.comp_layers:
-            for l in j:
-                l.update_value() # проверить реализацию
+        for node in self.order:
+            node.update_value()
         return {key: c.v for key, c in self.c.items()}
 
+    def dependencies(self) -> dict[str, set[str]]:
+        """
+        Names of the inputs every output structurally depends on, from one
+        sweep over `order`. Pairs missing here have zero derivative.
+        """
+        deps = {}
+        for node in self.order:
+            if type(node) is const:
+                deps[id(node)] = frozenset()
+            elif isinstance(node, variable):
+                deps[id(node)] = frozenset((node.name,))
+            else:
+                deps[id(node)] = frozenset().union(*(deps[id(p)] for p in node.p))
+        return {key: set(deps[id(node)]) for key, node in self.c.items()}
+
+    def vjp(self, inputs: dict, cotangent: dict) -> dict:
+        """
+        Vector-Jacobian product: sum over outputs of cotangent[out]*d out/d input,
+        for every input of the program. One forward pass with the interpreter
+        and one reverse sweep over `order`, whatever the number of inputs.
+        Inputs missing from `inputs` keep their last value.
+        """
+        self.__bind_variables(self.parameter_values)
+        for name, val in inputs.items():
+            if name in self.input_signature:
+                self.input_signature[name].v = val
+        self.run()
+        adjoint = {}
+        for key, g in cotangent.items():
+            if key in self.c:
+                node = self.c[key]
+                adjoint[id(node)] = adjoint.get(id(node), 0.0) + g
+        for node in reversed(self.order):
+            if not node.p or (g := adjoint.pop(id(node), None)) is None:
+                continue
+            for p, a in zip(node.p, node.backward(g)):
+                k = id(p)
+                adjoint[k] = adjoint[k] + a if k in adjoint else a
+        return {name: adjoint.get(id(node), 0.0) for name, node in self.input_signature.items()}
+
+    def gradient(self, output_key, inputs: dict) -> dict:
+        """Derivatives of one output by every input, see `vjp`."""
+        return self.vjp(inputs, {output_key: 1.0})
+
+    def get_source(self, arg_names=None, out_names=None, function_name='__program', batch=False) -> str:
+        """
+        Straight-line python source of the program: one local per node.
+
+        The generated function takes a sequence of values ordered like
+        `arg_names` and returns a list ordered like `out_names`.
+        Outputs missing from the program are returned as 0.0.
+
+        With `batch=True` the sequence holds a whole ensemble in
+        structure-of-arrays order (all values of the first argument, then
+        all values of the second, ...) and so does the returned list.
+
+        Parameters that are not in `arg_names` are read from a second
+        argument, the sequence of their values (shared by a whole batch).
+        """
+        arg_names = tuple(self.input_signature) if arg_names is None else tuple(arg_names)
+        out_names = tuple(self.c) if out_names is None else tuple(out_names)
+        if batch and not arg_names:
+            raise ValueError('batch program needs at least one argument')
+        args = {name: f'_a{i}' for i, name in enumerate(arg_names)}
+        params = self.__free_parameters(arg_names)
+        indent = ' '*(8 if batch else 4)
+        local = {}
+        body = []
+        for node in topological_order(self.c.values()):
+            if type(node) is const:
+                local[id(node)] = node.get_code()
+            elif isinstance(node, variable):
+                local[id(node)] = args.get(node.name) or params.get(node.name) or f'({node.v!r})'
+            else:
+                name = f'_n{len(body)}'
+                body.append(f'{indent}{name} = {node.get_code(*(local[id(p)] for p in node.p))}')
+                local[id(node)] = name
+        outs = [local[id(self.c[k])] if k in self.c else '0.0' for k in out_names]
+
+        defaults = ''.join(f', {f}={f}' for f in compiled_namespace)
+        lines = [f'def {function_name}(_x{", _q" if params else ""}{defaults}):']
+        if params:
+            lines.extend(self.__unpack_parameters(params, '    '))
+        if batch:
+            lines.append(f'    _m = len(_x)//{len(arg_names)}')
+            for i in range(len(outs)):
+                lines.append(f'    _o{i} = []; _p{i} = _o{i}.append')
+            columns = ', '.join(f'_x[{i}*_m:{i + 1}*_m]' for i in range(len(arg_names)))
+            lines.append(f'    for {", ".join(args.values())}, in zip({columns}):')
+            lines += body
+            lines += [f'        _p{i}({o})' for i, o in enumerate(outs)]
+            lines.append(f'    return {" + ".join(f"_o{i}" for i in range(len(outs))) or "[]"}')
+        else:
+            if arg_names:
+                lines.append(f'    {", ".join(args.values())}, = _x')
+            lines += body
+            lines.append(f'    return [{", ".join(outs)}]')
+        return '\n'.join(lines) + '\n'
+
+    def compile(self, arg_names=None, out_names=None, batch=False, functions=None, parameters=None):
+        """
+        `functions` replaces the math functions the generated code calls,
+        e.g. `diffeq.utils.dual.functions` to evaluate on dual numbers.
+
+        The returned function takes the argument values only: parameters are
+        read from `parameter_values` (changed in place by `bind`) or, when
+        given, from the `parameters` sequence.
+        """
+        arg_names = tuple(self.input_signature) if arg_names is None else tuple(arg_names)
+        out_names = tuple(self.c) if out_names is None else tuple(out_names)
+        functions = compiled_namespace if functions is None else functions
+        key = (arg_names, out_names, batch, *(functions[f] for f in compiled_namespace))
+        if key not in self.__compiled:
+            source = self.get_source(arg_names, out_names, batch=batch)
+            namespace = {f: functions[f] for f in compiled_namespace}
+            exec(compile(source, f'<program {id(self):x}>', 'exec'), namespace)
+            self.__compiled[key] = self.__with_parameters(namespace['__program'], arg_names)
+        return self.__compiled[key] if parameters is None else self.__with_parameters(
+            self.__compiled[key], arg_names, parameters)
+
+    def get_taylor_source(self, arg_names, out_names=None, function_name='__taylor') -> str:
+        """
+        Python source of the Taylor coefficients of the solution of x' = F(x)
+        where `out_names[i]` (by default `arg_names[i]`) is the derivative of
+        `arg_names[i]`, missing outputs are 0.
+
+        Automatic differentiation style: every node keeps the list of its
+        coefficients, coefficient k of a node follows from coefficients 0..k
+        of its parents and coefficient k + 1 of x is coefficient k of F(x)
+        over k + 1. The generated function takes the values of `arg_names`
+        and the order and returns one list of order + 1 coefficients per argument;
+        parameters are constants of the series, read like in `get_source`.
+        """
+        arg_names = tuple(arg_names)
+        out_names = arg_names if out_names is None else tuple(out_names)
+        args = {name: f'_a{i}' for i, name in enumerate(arg_names)}
+        params = self.__free_parameters(arg_names)
+        local = {}
+        before, loop = [], []
+        for node in topological_order(self.c.values()):
+            if type(node) is not const and isinstance(node, variable) and node.name in args:
+                local[id(node)] = args[node.name]
+                continue
+            name = f'_n{len(local)}'
+            local[id(node)] = name
+            if type(node) is not const and isinstance(node, variable) and node.name in params:
+                before.append(f'    {name} = [{params[node.name]}] + _zeros')
+            elif isinstance(node, variable):
+                before.append(f'    {name} = [{node.v!r}] + _zeros')
+            else:
+                b, l = node.get_taylor_code(name, *(local[id(p)] for p in node.p))
+                before += [f'    {name} = []', *(f'    {k}' for k in b)]
+                loop += [f'        {k}' for k in l]
+        defaults = ''.join(f', {f}={f}' for f in compiled_namespace)
+        lines = [f'def {function_name}(_x, _order{", _q" if params else ""}{defaults}):',
+                 '    _zeros = [0.0]*_order']
+        if params:
+            lines.extend(self.__unpack_parameters(params, '    '))
+        lines += [f'    {a} = [_x[{i}]]' for i, a in enumerate(args.values())]
+        lines += before
+        lines.append('    for _k in range(_order):')
+        lines += loop
+        for a, out in zip(args.values(), out_names):
+            lines.append(f'        {a}.append({local[id(self.c[out])]}[_k]/(_k + 1))' if out in self.c
+                         else f'        {a}.append(0.0)')
+        lines.append(f'    return [{", ".join(args.values())}]')
+        return '\n'.join(lines) + '\n'
+
+    def taylor(self, arg_names, out_names=None, parameters=None):
+        """Compiled `get_taylor_source`, kept like the programs of `compile` (`parameters` like there)."""
+        arg_names = tuple(arg_names)
+        out_names = arg_names if out_names is None else tuple(out_names)
+        key = ('taylor', arg_names, out_names)
+        if key not in self.__compiled:
+            namespace = dict(compiled_namespace)
+            exec(compile(self.get_taylor_source(arg_names, out_names), f'<taylor {id(self):x}>', 'exec'), namespace)
+            self.__compiled[key] = self.__with_parameters(namespace['__taylor'], arg_names)
+        return self.__compiled[key] if parameters is None else self.__with_parameters(
+            self.__compiled[key], arg_names, parameters)
+
+    def __free_parameters(self, arg_names) -> dict:
+        # numbered by position in `parameter_values`, which is passed whole as _q
+        return {name: f'_b{i}' for i, name in enumerate(self.parameter_names) if name not in arg_names}
+
+    def __unpack_parameters(self, params: dict, indent) -> list[str]:
+        if len(params) == len(self.parameter_names):
+            return [f'{indent}{", ".join(params.values())}, = _q']
+        # parameters given as arguments are skipped
+        return [f'{indent}{v} = _q[{self.parameter_names.index(n)}]' for n, v in params.items()]
+
+    def __with_parameters(self, function, arg_names, parameters=None):
+        if not self.__free_parameters(arg_names):
+            return function
+        if isinstance(function, functools.partial):
+            function = function.func
+        return functools.partial(function, _q=self.parameter_values if parameters is None else parameters)
+
     def remove_equal_nodes(self):
-        for l, n in enumerate(self.comp_layers):
-            k = []
-            for j in n:
-                if j not in k:
-                    k.append(j)
-            self.comp_layers[l] = k
-        for l, n in enumerate(self.comp_layers[:-1]):
-            for j in n:
-                for c in self.c.values():
-                    c.replace_eq_parent_node(j)
+        self.c = dict(zip(self.c.keys(), hash_cons(self.c.values())))
 
     def __str__(self) -> str:
         o = ""
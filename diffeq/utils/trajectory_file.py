@@ -0,0 +1,169 @@
+"""
+Binary trajectory files.
+
+Layout (all integers and values little-endian):
+
+    offset  size  field
+    0       8     magic b'DIFFEQTR'
+    8       2     version (1)
+    10      1     dtype: b'd' (float64) or b'f' (float32)
+    11      1     byte order of the values: b'<' (0 in older files, also little-endian)
+    12      4     number of axes
+    16      8     capacity: values reserved per column
+    24      8     length: values written per column
+    32      ...   for every axis: 2-byte name length + utf-8 name
+    ...           zero padding up to a multiple of 64 bytes
+    data          one contiguous column of `capacity` values per axis, in header order
+
+The writer appends chunks into every column and updates `length`,
+the reader maps the file and exposes columns as memoryviews without copying
+(on big-endian hosts values are swapped on write and columns are swapped copies).
+"""
+from array import array
+import mmap
+import struct
+import sys
+
+from diffeq.utils.vectors import vector
+
+MAGIC = b'DIFFEQTR'
+VERSION = 1
+_HEAD = struct.Struct('<8sHccIQQ')
+_LITTLE = b'<'
+# values are stored little-endian, native arrays are swapped on other hosts
+_SWAP = sys.byteorder != 'little'
+_LENGTH_OFFSET = 24
+_ALIGN = 64
+
+
+def _data_offset(names: list) -> int:
+    size = _HEAD.size + sum(2 + len(n) for n in names)
+    return -(-size//_ALIGN)*_ALIGN
+
+
+class trajectory_writer:
+    """
+    Writes columns into a new trajectory file. `capacity` values are reserved
+    per axis, chunks are appended with `append` until it is reached.
+    """
+    def __init__(self, path, axes, capacity: int, dtype='d'):
+        if dtype not in ('d', 'f'):
+            raise ValueError(f"dtype must be 'd' or 'f', not {dtype!r}")
+        self.axes = tuple(axes)
+        self.capacity = capacity
+        self.dtype = dtype
+        self.length = 0
+        self.itemsize = array(dtype).itemsize
+        names = [a.encode('utf-8') for a in self.axes]
+        self.offset = _data_offset(names)
+        self.file = open(path, 'wb+')
+        header = _HEAD.pack(MAGIC, VERSION, dtype.encode(), _LITTLE, len(names), capacity, 0)
+        header += b''.join(struct.pack('<H', len(n)) + n for n in names)
+        self.file.write(header.ljust(self.offset, b'\0'))
+        self.file.truncate(self.offset + len(names)*capacity*self.itemsize)
+
+    def append(self, chunk: dict):
+        """Appends equally long sequences of values for every axis of the file."""
+        n = len(chunk[self.axes[0]])
+        if self.length + n > self.capacity:
+            raise ValueError(f'capacity {self.capacity} exceeded')
+        for i, axis in enumerate(self.axes):
+            values = chunk[axis]
+            if len(values) != n:
+                raise ValueError(f'column {axis!r} has {len(values)} values, expected {n}')
+            self.file.seek(self.offset + (i*self.capacity + self.length)*self.itemsize)
+            if _SWAP:
+                values = array(self.dtype, values)
+                values.byteswap()
+            self.file.write(values if isinstance(values, array) and values.typecode == self.dtype
+                            else array(self.dtype, values))
+        self.length += n
+        self.file.seek(_LENGTH_OFFSET)
+        self.file.write(struct.pack('<Q', self.length))
+
+    def write_stream(self, stream, chunk=4096, time_axis='time'):
+        """Appends `(t, state_vector)` pairs from `system.iterate`, `chunk` at a time."""
+        buffer = {a: array(self.dtype) for a in self.axes}
+        for t, state in stream:
+            for a in self.axes:
+                buffer[a].append(t if a == time_axis else state[a])
+            if len(buffer[time_axis]) >= chunk:
+                self.append(buffer)
+                buffer = {a: array(self.dtype) for a in self.axes}
+        if buffer[time_axis]:
+            self.append(buffer)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class trajectory_reader(vector):
+    """
+    Memory-mapped trajectory file: a dict of axis -> memoryview column, usable
+    wherever a history from `system.run` is. Views must be released before `close`.
+    On big-endian hosts the columns are byteswapped array('d'/'f') copies instead.
+    """
+    def __init__(self, path):
+        super().__init__()
+        self.file = open(path, 'rb')
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, dtype, order, n_axes, self.capacity, self.length = _HEAD.unpack_from(self.mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f'{path} is not a trajectory file')
+        if version != VERSION:
+            raise ValueError(f'unsupported trajectory file version {version}')
+        if order not in (_LITTLE, b'\0'):
+            raise ValueError(f'unsupported byte order {order!r} in {path}')
+        self.dtype = dtype.decode()
+        itemsize = array(self.dtype).itemsize
+        names = []
+        pos = _HEAD.size
+        for _ in range(n_axes):
+            (size,) = struct.unpack_from('<H', self.mm, pos)
+            names.append(bytes(self.mm[pos + 2:pos + 2 + size]))
+            pos += 2 + size
+        self.axes = tuple(n.decode('utf-8') for n in names)
+        offset = _data_offset(names)
+        view = memoryview(self.mm)
+        for i, axis in enumerate(self.axes):
+            start = offset + i*self.capacity*itemsize
+            column = view[start:start + self.length*itemsize].cast(self.dtype)
+            if _SWAP:
+                values = array(self.dtype, column)
+                column.release()
+                values.byteswap()
+                column = values
+            self[axis] = column
+
+    def close(self):
+        for column in self.values():
+            if isinstance(column, memoryview):
+                column.release()
+        self.clear()
+        self.mm.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def save(history: dict, path, dtype='d'):
+    """Writes a history returned by `system.run` into one file."""
+    axes = tuple(history)
+    length = len(history[axes[0]]) if axes else 0
+    with trajectory_writer(path, axes, length, dtype) as w:
+        if length:
+            w.append(history)
+
+
+def load(path) -> trajectory_reader:
+    return trajectory_reader(path)
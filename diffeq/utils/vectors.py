@@ -1,4 +1,5 @@
 from typing import Callable
+import diffeq.utils.dual as _dual
 import diffeq.utils.symbolic as symb
 from diffeq.utils.string_operations import get_table
 
@@ -65,48 +66,177 @@ class vector(dict):
         total_keys = set(b.keys()) | set(self.keys())
         return sum(b.get(k, 0) * self.get(k, 0) for k in total_keys)
 
+class layout:
+    """Fixed order of axes shared by every state of one system."""
+    __slots__ = ('axes', 'index')
+
+    def __init__(self, axes):
+        self.axes: tuple = tuple(axes)
+        self.index: dict = {a: i for i, a in enumerate(self.axes)}
+
+    def __len__(self):
+        return len(self.axes)
+
+    def pack(self, vec: dict) -> list:
+        return [vec.get(a, 0.0) for a in self.axes]
+
+    def unpack(self, data) -> vector:
+        return vector(zip(self.axes, data))
+
+
+class state_vector:
+    """Compact state: plain list of values indexed by the position of the axis in the layout."""
+    __slots__ = ('layout', 'data')
+
+    def __init__(self, layout: layout, data: list):
+        self.layout = layout
+        self.data = data
+
+    @classmethod
+    def from_vector(cls, vec: dict, layout: layout):
+        return cls(layout, layout.pack(vec))
+
+    def to_vector(self) -> vector:
+        return self.layout.unpack(self.data)
+
+    def __getitem__(self, axis):
+        return self.data[self.layout.index[axis]]
+
+    def __len__(self):
+        return len(self.data)
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __str__(self):
+        return str(self.to_vector())
+
+
+class state_view(vector):
+    """
+    Vector of the values of a state_vector when it was taken; assigning an
+    axis of the layout also writes the value into the state.
+    """
+    def __init__(self, state: state_vector):
+        super().__init__(zip(state.layout.axes, state.data))
+        self.__state = state
+
+    def __setitem__(self, axis, value):
+        super().__setitem__(axis, value)
+        state = self.__state
+        if axis in state.layout.index:
+            data = list(state.data)
+            data[state.layout.index[axis]] = value
+            state.data = data
+
+
 def vector_function_to_str(foo):
     d = foo.c
     return get_table(('axis', 'function'), [[k, str(v)] for k, v in d.items()])
 
 
 class vector_function(symb.program):
-    def __init__(self, function: Callable, input_signature = None, divergence_axis = 'div'):
-        input_signature = function.__code__.co_varnames[:function.__code__.co_argcount] if input_signature is None else input_signature
+    def __init__(self, function: Callable, input_signature = None, divergence_axis = 'div', compiled = True,
+                 positions = (), momenta = (), parameters: dict = None):
+        # parameters (name -> default value) stay symbolic, see `program.bind`
+        parameters = {} if parameters is None else dict(parameters)
+        input_signature = [a for a in function.__code__.co_varnames[:function.__code__.co_argcount]
+                           if a not in parameters] if input_signature is None else input_signature
         self.in_axes: set = set(input_signature)
+        self.in_order: tuple = tuple(input_signature)
         self.__vars: dict['str':symb.variable] = {
             k: symb.variable(k) for k in input_signature}
-        out = function(**self.__vars)
+        out = function(**self.__vars, **{k: symb.variable(k, v) for k, v in parameters.items()})
         out = {k:symb.to_node(v) for k, v in out.items()}
-        self.out_axes = out.keys()
+        self.out_axes = tuple(out)
         self.__foo = out
-        super().__init__(self.__foo)
+        super().__init__(self.__foo, compiled=compiled, parameters=parameters)
         self.divergence_axis = divergence_axis
+        # canonical coordinates for the symplectic integrators, see `partition`
+        self.positions: tuple = ()
+        self.momenta: tuple = ()
+        if positions or momenta:
+            self.partition(positions, momenta)
         self.__yacobian = None
+        self.__sparse_yacobian = None
         self.__div = None
 
-    def __call__(self, vec: dict | vector):
-        return vector(super().__call__(**vec))
+    def __call__(self, vec: dict | vector, **parameters):
+        """Value at `vec`; keyword arguments override parameter values for this call only."""
+        if self.compiled:
+            values = [vec.get(k, 0.0) for k in self.in_order]
+            bound = [parameters.get(k, v) for k, v in zip(self.parameter_names, self.parameter_values)] \
+                if parameters else None
+            # math functions refuse dual numbers (forward-mode differentiation)
+            dual = any(isinstance(v, _dual.dual) for v in (*values, *(bound or self.parameter_values)))
+            functions = _dual.functions if dual else None
+            out = self.compile(self.in_order, functions=functions, parameters=bound)(values)
+            return vector(zip(self.out_axes, out))
+        return vector(super().__call__(**{**vec, **parameters}))
+
+    def partition(self, positions, momenta) -> 'vector_function':
+        """
+        Declares the position and momentum axes of a separable Hamiltonian
+        system: derivatives of positions may only depend on momenta and
+        derivatives of momenta only on positions. Returns self.
+        """
+        positions, momenta = tuple(positions), tuple(momenta)
+        deps = {k: v & self.in_axes for k, v in self.dependencies().items()}
+        for axes, allowed, kind in ((positions, momenta, 'position'), (momenta, positions, 'momentum')):
+            for a in axes:
+                if a not in self.out_axes:
+                    raise ValueError(f'{kind} axis {a!r} has no derivative')
+                if not deps[a] <= set(allowed):
+                    raise ValueError(f'derivative of {kind} axis {a!r} depends on {sorted(deps[a] - set(allowed))}, '
+                                     'the system is not separable')
+        self.positions, self.momenta = positions, momenta
+        return self
+
+    def vjp(self, vec: dict | vector, cotangent: dict | vector) -> vector:
+        out = super().vjp(vec, cotangent)
+        return vector({k: out.get(k, 0.0) for k in self.in_order})
+
+    def gradient(self, output_axis, vec: dict | vector) -> vector:
+        return self.vjp(vec, {output_axis: 1.0})
 
     def __str__(self):
         return vector_function_to_str(self)
 
     def __generate_yacobian(self):
         if self.__yacobian is None:
+            # every entry, the structural zeros are constants
+            sparse = self.sparse_yacobian.c
+            F = {f'd{outa}_d{ina}': sparse.get(f'd{outa}_d{ina}') or symb.const(0.0)
+                 for outa in self.out_axes for ina in self.in_order}
+            self.__yacobian = self.__derived(F)
+
+    def __generate_sparse_yacobian(self):
+        if self.__sparse_yacobian is None:
+            # only the structurally non-zero entries, absent ones read as 0.0
             F = dict()
+            cache = {}
+            deps = self.dependencies()
             for outa in self.out_axes:
-                for ina in self.in_axes:
-                    inds = 'd' + outa + '_d' + ina
-                    F[inds] = self.c[outa].diff(ina)
-
-            __yacobian = symb.program(F)
-            self.__yacobian = vector_function(__yacobian, input_signature = self.input_signature)
+                for ina in self.in_order:
+                    if ina in deps[outa]:
+                        F[f'd{outa}_d{ina}'] = self.c[outa].diff(ina, cache)
+            self.__sparse_yacobian = self.__derived(F)
 
     def __generate_div(self):
         if set(self.in_axes) != set(self.out_axes):
             raise Exception('output axes different from input')
         if self.__div is None:
-            self.__div = vector_function(lambda **args:vector({self.divergence_axis:sum(self.yacobian(args)[f'd{k}_d{k}'] for k in self.in_axes)}), input_signature=self.input_signature)
+            J = self.sparse_yacobian.c
+            diagonal = [J[f'd{k}_d{k}'] for k in self.in_order if f'd{k}_d{k}' in J]
+            trace = symb.add(*diagonal) if diagonal else symb.const(0.0)
+            self.__div = self.__derived({self.divergence_axis: trace})
+
+    def __derived(self, code: dict) -> 'vector_function':
+        # same inputs and the same parameter values (one list, bound together)
+        f = vector_function(lambda **_: code, input_signature=self.in_order, compiled=self.compiled,
+                            parameters=self.parameters)
+        f.parameter_values = self.parameter_values
+        return f
 
     @property
     def div(self):
@@ -116,4 +246,10 @@ class vector_function(symb.program):
     @property
     def yacobian(self):
         self.__generate_yacobian()
-        return self.__yacobian
\ No newline at end of file
+        return self.__yacobian
+
+    @property
+    def sparse_yacobian(self):
+        """Jacobian with only the entries `dependencies()` allows to be non-zero."""
+        self.__generate_sparse_yacobian()
+        return self.__sparse_yacobian
\ No newline at end of file
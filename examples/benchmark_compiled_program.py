@@ -0,0 +1,37 @@
+"""Evaluations per second: node-by-node interpreter vs compiled program"""
+from timeit import timeit
+from diffeq import *
+import diffeq.utils.symbolic as symb
+
+N = 20000
+
+a, b, c = -15, 35, -3/2
+lorenz = lambda x, y, z: vector(
+    x=a*(x - y),
+    y=b*x - y - z*x,
+    z=x*y + c*z)
+
+tomas = lambda x, y, z: vector(
+    x=-0.2*x + symb.sin(y),
+    y=-0.2*y + symb.sin(z),
+    z=-0.2*z + symb.sin(x))
+
+point = vector(x=1.0, y=2.0, z=3.0)
+
+print(f"{'system':<10}{'interpreter, ev/s':>20}{'compiled, ev/s':>20}{'speedup':>10}")
+for name, f in (('lorenz', lorenz), ('tomas', tomas)):
+    interpreted = vector_function(f, compiled=False)
+    compiled = vector_function(f)
+    assert all(abs(interpreted(point)[k] - compiled(point)[k]) < 1e-12 for k in point)
+
+    raw = compiled.compile(compiled.in_order)
+    args = [point[k] for k in compiled.in_order]
+
+    t_interp = timeit(lambda: interpreted(point), number=N)
+    t_comp = timeit(lambda: compiled(point), number=N)
+    t_raw = timeit(lambda: raw(args), number=N)
+    print(f"{name:<10}{N/t_interp:>20.0f}{N/t_comp:>20.0f}{t_interp/t_comp:>9.1f}x")
+    print(f"{name + ' raw':<10}{'':>20}{N/t_raw:>20.0f}{t_interp/t_raw:>9.1f}x")
+
+print('\ngenerated source for the lorenz system:')
+print(vector_function(lorenz).get_source(('x', 'y', 'z')))
@@ -0,0 +1,30 @@
+"""Build, evaluation and Jacobian times of deep chained expressions with shared subexpressions"""
+import time
+import diffeq.utils.symbolic as symb
+from diffeq import *
+
+
+def chain(n):
+    # every link uses the two previous values, depth n and heavy sharing
+    def f(x, y):
+        a, b = x, y
+        for _ in range(n):
+            a, b = b, symb.sin(a)*0.5 + b*a*0.25 + 0.1
+        return vector(x=a, y=b)
+    return f
+
+
+point = vector(x=0.3, y=0.2)
+for n in (100, 1000, 5000, 15000):
+    t = time.perf_counter()
+    F = vector_function(chain(n))
+    t_build = time.perf_counter() - t
+    t = time.perf_counter()
+    F(point)
+    t_call = time.perf_counter() - t
+    t = time.perf_counter()
+    J = F.yacobian
+    J(point)
+    t_jac = time.perf_counter() - t
+    print(f'depth {n:<6} nodes {F.node_counts}  build {t_build:6.2f}s  '
+          f'first call {t_call:6.2f}s  yacobian {t_jac:6.2f}s {J.node_counts}')
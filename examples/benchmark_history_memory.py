@@ -0,0 +1,39 @@
+"""Memory and time of system.run: preallocated array('d') columns vs lists of boxed floats"""
+import time
+import tracemalloc
+from diffeq import *
+
+a, b, c = -15, 35, -3/2
+lorenz = system(vector_function(lambda x, y, z: vector(
+    x=a*(x - y),
+    y=b*x - y - z*x,
+    z=x*y + c*z)), rk4_integrator(0.001, 1))
+
+
+def run_with_lists(sys, t_end):
+    # the way histories were recorded before: one list append per axis and step
+    t = 0
+    history = {k: [] for k in sys.layout.axes}
+    history['time'] = []
+    while True:
+        for k, v in sys.state.items():
+            history[k].append(v)
+        history['time'].append(t)
+        sys.update()
+        t += sys.solver.dt*sys.solver.ii
+        if t >= t_end:
+            break
+    return history
+
+
+for name, run in (('lists', run_with_lists), ('arrays', system.run)):
+    lorenz.state = vector(x=1.0, y=1.0, z=1.0)
+    tracemalloc.start()
+    t = time.perf_counter()
+    history = run(lorenz, 100)
+    t = time.perf_counter() - t
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<8} steps: {len(history['x'])}  time: {t:.2f}s  "
+          f"kept: {current/2**20:.1f} MiB  peak: {peak/2**20:.1f} MiB")
+    del history
@@ -0,0 +1,28 @@
+"""Size and write time of interactive.generate_html for every payload encoding"""
+import os
+import time
+from random import gauss, seed
+import diffeq.plotting.interactive as interactive
+from diffeq import *
+
+if not os.path.exists('output'):
+    os.makedirs('output')
+
+seed(0)
+a, b, c, d = 0.1, 0.1, 14, 0.08
+trillium_sys = system(
+    vector_function(lambda x, y, z: 10*vector(x=a*x - b*y*z,
+                                              y=-c*y + x*z,
+                                              z=-d*z + x*y
+                                              )), rk4_integrator(0.01, 1)
+)
+trillium_trjs = trillium_sys.run_ensemble(
+    [vector(x=gauss(), y=gauss(), z=gauss())*2 for _ in range(50)], 10)
+
+for encoding in ('text', 'f32', 'f16', 'i16'):
+    path = f'output/trillium_{encoding}.html'
+    t = time.perf_counter()
+    interactive.generate_html(trillium_trjs, ('x', 'y', 'z'), color=interactive.start_end_grad(),
+                              title=f'Trillium Attractor ({encoding})', path=path, encoding=encoding)
+    t = time.perf_counter() - t
+    print(f'{encoding:<5} {os.path.getsize(path)/2**20:8.2f} MiB  {t:6.2f}s')
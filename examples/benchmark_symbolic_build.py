@@ -0,0 +1,40 @@
+"""Build time and node counts of symbolic programs, their Jacobians and second derivatives"""
+import time
+import diffeq.utils.symbolic as symb
+from diffeq import *
+
+
+def lorenz(x, y, z):
+    a, b, c = -15, 35, -3/2
+    return vector(x=a*(x - y), y=b*x - y - z*x, z=x*y + c*z)
+
+
+def tomas(x, y, z):
+    a, b = 0.2, 1.0
+    return vector(x=-a*x + b*symb.sin(y), y=-a*y + b*symb.sin(z), z=-a*z + b*symb.sin(x))
+
+
+def coupled(n):
+    names = [f'x{i}' for i in range(n)]
+
+    def f(**x):
+        return vector({a: x[names[i - 1]]*x[names[(i + 1) % n]] - x[a] + symb.sin(x[names[(i + 2) % n]])
+                       for i, a in enumerate(names)})
+    return f, names
+
+
+def timed(f):
+    t = time.perf_counter()
+    out = f()
+    return out, (time.perf_counter() - t)*1e3
+
+
+systems = [('lorenz', lorenz, None), ('tomas', tomas, None)]
+systems += [(f'coupled {n}', *coupled(n)) for n in (5, 10, 20)]
+for name, f, names in systems:
+    F, t_build = timed(lambda: vector_function(f, input_signature=names))
+    J, t_jac = timed(lambda: F.yacobian)
+    H, t_hess = timed(lambda: J.yacobian)
+    print(f'{name:<11} build {t_build:7.2f} ms {F.node_counts}')
+    print(f'{"":<11} yacobian {t_jac:7.2f} ms {J.node_counts}')
+    print(f'{"":<11} second derivatives {t_hess:7.2f} ms {H.node_counts}')
@@ -0,0 +1,55 @@
+"""Bifurcation diagram of the Rössler system over c, serial loop against diffeq.sweeps on a process pool"""
+import os
+import time
+from diffeq import *
+from diffeq.sweeps import sweep, maxima
+
+
+def report(stats):
+    print(f'\r{stats["points"]:>4}/{stats["total"]} points  {stats["points_per_second"]:6.1f} points/s  '
+          f'{stats["states_per_second"]:9.0f} states/s', end='', flush=True)
+
+
+if __name__ == '__main__':
+    rossler = vector_function(lambda x, y, z, a, b, c: vector(x=-y - z, y=x + a*y, z=b + z*(x - c)),
+                              parameters={'a': 0.2, 'b': 0.2, 'c': 5.7})
+    initials = vector(x=1.0, y=1.0, z=1.0)
+    values = [2.0 + 4.0*k/199 for k in range(200)]
+
+    # the hand-written loop: a full history per value
+    t = time.perf_counter()
+    sys = system(rossler, rk4_integrator(0.02, 5), initials)
+    serial = []
+    for c in values:
+        sys.bind(c=c)
+        sys.state = initials
+        x = sys.run(300)['x'][2000:]  # records every 0.1, transient 200
+        serial.append(sum(1 for a, b, d in zip(x, x[1:], x[2:]) if a < b >= d))
+    serial_time = time.perf_counter() - t
+    print(f'serial loop: {serial_time:.2f}s')
+
+    diagram = sweep(rossler, rk4_integrator(0.02, 5), initials, maxima('x'))
+    t = time.perf_counter()
+    result = diagram.run({'c': values}, 300, transient=200, progress=report)
+    t = time.perf_counter() - t
+    print(f'\n{os.cpu_count()} workers: {t:.2f}s  speedup {serial_time/t:.1f}x  '
+          f'{diagram.stats["records"]} maxima')
+    print(f'same number of maxima per value: {[list(result["c"]).count(c) for c in values] == serial}')
+
+    # period of the orbit: distinct maxima per value of c
+    for c in values[::20]:
+        peaks = {round(x, 2) for cc, x in zip(result['c'], result['x']) if cc == c}
+        print(f'c = {c:4.2f}  {len(peaks):3} distinct maxima')
+
+    try:
+        import matplotlib.pyplot as plt
+    except ImportError:
+        plt = None
+    if plt is not None:
+        plt.figure(figsize=(8, 5))
+        plt.plot(result['c'], result['x'], ',k')
+        plt.xlabel('c')
+        plt.ylabel('maxima of x')
+        if not os.path.exists('output'):
+            os.makedirs('output')
+        plt.savefig('output/rossler_bifurcation.png', dpi=150)
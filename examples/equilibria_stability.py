@@ -0,0 +1,42 @@
+"""Equilibria of the Lorenz system and their stability over rho, batched Newton against Newton on numerical Jacobians"""
+import random
+import time
+from diffeq import *
+from diffeq.equilibria import equilibrium_finder
+from diffeq.utils.linalg import lu_factor, lu_solve
+
+lorenz = vector_function(lambda x, y, z, sigma, rho, beta: vector(x=sigma*(y - x), y=x*(rho - z) - y, z=x*y - beta*z),
+                         parameters={'sigma': 10.0, 'rho': 28.0, 'beta': 8/3})
+random.seed(0)
+seeds = [vector(x=random.uniform(-20, 20), y=random.uniform(-20, 20), z=random.uniform(0, 50)) for _ in range(500)]
+axes = ('x', 'y', 'z')
+
+
+def newton(x, tol=1e-10):
+    """Plain Newton with the central-difference Jacobian, 2*n evaluations per iteration."""
+    for _ in range(50):
+        f = lorenz(x)
+        if max(abs(v) for v in f.values()) <= tol:
+            return x
+        J = jacobian(lorenz, x)
+        step = lu_solve(lu_factor([[J[f'd{o}_d{i}'] for i in axes] for o in axes]), [-f[a] for a in axes])
+        x = vector({a: x[a] + d for a, d in zip(axes, step)})
+    return None
+
+
+t = time.perf_counter()
+roots = [newton(x) for x in seeds]
+t_numerical = time.perf_counter() - t
+print(f'numerical Jacobian: {t_numerical:.2f}s, {sum(r is not None for r in roots)} of {len(seeds)} converged')
+
+finder = equilibrium_finder(lorenz)
+t = time.perf_counter()
+found = finder.find(seeds)
+t_batched = time.perf_counter() - t
+print(f'batched symbolic Jacobian: {t_batched:.2f}s, {finder.stats["converged"]} converged, '
+      f'{len(found)} distinct, {finder.stats["iterations"]} iterations')
+
+# pitchfork at rho = 1, Hopf bifurcation of the two outer equilibria near rho = 24.74
+for rho in (0.5, 1.5, 10, 24, 25, 28, 100):
+    kinds = sorted(f'{e.kind} ({e.seeds})' for e in finder.find(seeds, rho=rho))
+    print(f'rho = {rho:5}  ' + ', '.join(kinds))
@@ -0,0 +1,37 @@
+"""Landing time, oscillation period and escape times located with events instead of full histories"""
+import math
+import time
+import diffeq.utils.symbolic as symb
+from diffeq import *
+from diffeq.SDE import event
+
+# a ball dropped from 10 m lands after sqrt(2h/g)
+ball = system(vector_function(lambda y, v: vector(y=v, v=-9.81)), rk4_integrator(0.1, 10), vector(y=10.0, v=0.0))
+(name, t, state), = ball.find_events([event(lambda y: y, direction=-1, terminal=True, name='ground')], 100)
+print(f'{name}: t = {t:.12f} (exact {math.sqrt(20/9.81):.12f}), v = {state["v"]:.6f}')
+
+# period of a pendulum from its upward zero crossings
+pendulum = system(vector_function(lambda q, p: vector(q=p, p=-symb.sin(q))), rk4_integrator(0.05, 1),
+                  vector(q=0.0, p=1.5))
+crossings = [t for _, t, _ in pendulum.find_events([event(lambda q: q, direction=1, name='up')], 100)]
+periods = [b - a for a, b in zip(crossings, crossings[1:])]
+print(f'pendulum: {len(crossings)} upward crossings, period {sum(periods)/len(periods):.9f}')
+
+# escape times from the Henon–Heiles potential above the escape energy 1/6
+henon_heiles = vector_function(lambda x, y, u, v: vector(x=u, y=v, u=-x - 2*x*y, v=-y - x*x + y*y))
+escape = event(lambda x, y: x*x + y*y - 4, direction=1, terminal=True, name='escape')
+energy, t_end = 0.2, 500
+sys = system(henon_heiles, rk4_integrator(0.01, 1))
+t = time.perf_counter()
+times = []
+for k in range(24):
+    angle = 2*math.pi*k/24
+    speed = math.sqrt(2*energy)
+    sys.state = vector(x=0.0, y=0.0, u=speed*math.cos(angle), v=speed*math.sin(angle))
+    found = sys.find_events([escape], t_end)
+    times.append(found[0][1] if found else math.inf)
+t = time.perf_counter() - t
+escaped = [v for v in times if v < math.inf]
+print(f'Henon-Heiles, E = {energy}: {len(escaped)}/{len(times)} escaped before t = {t_end}, '
+      f'mean escape time {sum(escaped)/max(1, len(escaped)):.2f}, {t:.2f}s '
+      f'({sum(min(v, t_end) for v in times)/0.01:.0f} steps instead of {len(times)*t_end/0.01:.0f})')
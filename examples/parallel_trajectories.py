@@ -0,0 +1,31 @@
+"""Wall-clock time of independent Trillium trajectories on 1..N processes"""
+import os
+import time
+from random import gauss, seed
+from diffeq import *
+from diffeq.parallel import run_parallel
+
+if __name__ == '__main__':
+    seed(0)
+    a, b, c, d = 0.1, 0.1, 14, 0.08
+    trillium = vector_function(lambda x, y, z: 10*vector(
+        x=a*x - b*y*z,
+        y=-c*y + x*z,
+        z=-d*z + x*y))
+    initials = [vector(x=gauss(), y=gauss(), z=gauss())*2 for _ in range(64)]
+
+    sys = system(trillium, rk4_integrator(0.01, 1))
+    t = time.perf_counter()
+    for x in initials:
+        sys.state = x
+        sys.run(10)
+    serial = time.perf_counter() - t
+    print(f'serial: {serial:.2f}s')
+
+    workers = 1
+    while workers <= os.cpu_count():
+        t = time.perf_counter()
+        histories = run_parallel(trillium, rk4_integrator(0.01, 1), initials, 10, max_workers=workers)
+        t = time.perf_counter() - t
+        print(f'{workers:>2} workers: {t:.2f}s  speedup {serial/t:.1f}x')
+        workers *= 2
@@ -0,0 +1,37 @@
+"""Scan of the Rössler parameter c: rebinding one compiled program against rebuilding the vector function"""
+import time
+from diffeq import *
+
+initials = vector(x=1.0, y=1.0, z=1.0)
+values = [2.5 + 0.25*k for k in range(16)]
+
+
+def maxima(history, skip):
+    """Distinct local maxima of x after the transient, rounded."""
+    x = history['x'][skip:]
+    return sorted({round(b, 2) for a, b, c in zip(x, x[1:], x[2:]) if a < b > c})
+
+
+rossler = vector_function(lambda x, y, z, a, b, c: vector(x=-y - z, y=x + a*y, z=b + z*(x - c)),
+                          parameters={'a': 0.2, 'b': 0.2, 'c': 5.7})
+sys = system(rossler, rk4_integrator(0.02, 5), initials)
+bound, t_bind = [], 0.0
+for c in values:
+    t = time.perf_counter()
+    sys.bind(c=c)
+    t_bind += time.perf_counter() - t
+    sys.state = initials
+    bound.append(maxima(sys.run(300), 1000))
+
+rebuilt, t_rebuild = [], 0.0
+for c in values:
+    t = time.perf_counter()
+    f = vector_function(lambda x, y, z: vector(x=-y - z, y=x + 0.2*y, z=0.2 + z*(x - c)))
+    f.compile(f.in_order)
+    t_rebuild += time.perf_counter() - t
+    rebuilt.append(maxima(system(f, rk4_integrator(0.02, 5), initials).run(300), 1000))
+
+for c, m in zip(values, bound):
+    print(f'c = {c:5.2f}  {len(m):3} maxima of x  {m[:4]}')
+print(f'same results: {bound == rebuilt}')
+print(f'setup per value: bind {t_bind/len(values)*1e6:.1f}us, rebuild {t_rebuild/len(values)*1e6:.1f}us')
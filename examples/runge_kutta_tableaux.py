@@ -0,0 +1,29 @@
+"""Order and cost of the tableau-driven Runge–Kutta integrators on a pendulum"""
+import math
+import time
+import diffeq.utils.symbolic as symb
+from diffeq import *
+from diffeq.SDE import explicit_rk_integrator
+
+
+class heun_integrator(explicit_rk_integrator):
+    a = ((), (1,))
+    b = (1/2, 1/2)
+
+
+print(rk6_integrator.get_step_source())
+
+pendulum = vector_function(lambda q, p: vector(q=p, p=-symb.sin(q)))
+initials = vector(q=1.0, p=0.0)
+reference = system(pendulum, taylor_integrator(0.01, 100, order=25), initials)
+reference.run(10.5)
+for cls in (heun_integrator, rk4_integrator, rk38_integrator, rk6_integrator, verner6_integrator):
+    errors = []
+    for dt in (0.1, 0.05):
+        sys = system(pendulum, cls(dt, round(1/dt)), initials)
+        t = time.perf_counter()
+        sys.run(10.5)
+        t = time.perf_counter() - t
+        errors.append(abs(sys.state['q'] - reference.state['q']))
+    print(f'{cls.__name__:<20} stages {len(cls.a)}  error {errors[0]:.2e} -> {errors[1]:.2e}  '
+          f'observed order {math.log2(errors[0]/errors[1]):.2f}  {t*1e3:.1f} ms')
@@ -0,0 +1,45 @@
+"""Sparse Jacobians of a discretised reaction-diffusion equation"""
+import time
+from random import random, seed
+from diffeq import *
+from diffeq.utils.calculus import column_groups
+
+seed(0)
+N = 200
+names = [f'u{i}' for i in range(N)]
+
+
+def heat(**u):
+    # u_t = u_xx + u(1 - u) on a ring, second differences with dx = 0.1
+    return vector({a: (u[names[i - 1]] - 2*u[a] + u[names[(i + 1) % N]])*100 + u[a]*(1 - u[a])
+                   for i, a in enumerate(names)})
+
+
+F = vector_function(heat, input_signature=names)
+point = vector({a: random() for a in names})
+
+t = time.perf_counter()
+J = F.sparse_yacobian
+print(f'symbolic: {len(J.out_axes)} of {N*N} entries generated in {time.perf_counter() - t:.2f}s')
+
+calls = 0
+
+
+def counted(x):
+    global calls
+    calls += 1
+    return F(x)
+
+
+sparsity = F.dependencies()
+print(f'{len(column_groups(sparsity, names))} column groups for {N} columns')
+exact = J(point)
+for method, kw in (('central', {}), ('central', {'sparsity': sparsity}),
+                   ('dual', {}), ('dual', {'sparsity': sparsity})):
+    calls = 0
+    t = time.perf_counter()
+    Jn = jacobian(counted, point, method=method, **kw)
+    t = time.perf_counter() - t
+    error = max(abs(Jn[k] - exact[k]) for k in Jn)
+    print(f'{method:<8} {"sparse" if kw else "dense":<7} {calls:>4} evaluations {t:6.3f}s '
+          f'{len(Jn):>6} entries  max error {error:.1e}')
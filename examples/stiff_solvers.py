@@ -0,0 +1,36 @@
+"""Steps and wall-clock time of implicit and explicit solvers on stiff problems"""
+import time
+from diffeq import *
+
+
+def compare(name, f, initials, t_end, solvers):
+    print(name)
+    for solver in solvers:
+        sys = system(f, solver, initials)
+        t = time.perf_counter()
+        sys.run(t_end)
+        t = time.perf_counter() - t
+        final = ', '.join(f'{k}={v:.6g}' for k, v in sys.state.items())
+        print(f'  {type(solver).__name__:<26} {t:7.2f}s  {sys.stats}\n  {"":<26} {final}')
+
+
+# Robertson's chemical kinetics, rate constants 0.04, 1e4, 3e7
+robertson = vector_function(lambda a, b, c: vector(
+    a=-0.04*a + 1e4*b*c,
+    b=0.04*a - 1e4*b*c - 3e7*b*b,
+    c=3e7*b*b))
+compare('Robertson, t = 40', robertson, vector(a=1.0, b=0.0, c=0.0), 40, [
+    backward_euler_integrator(0.1, 10),
+    bdf2_integrator(0.1, 10),
+    rosenbrock_integrator(1, 1, rtol=1e-4, atol=1e-8),
+    dopri5_integrator(1, 1, rtol=1e-4, atol=1e-8, h=1e-6),
+])
+
+# Van der Pol oscillator with mu = 1000
+mu = 1000
+van_der_pol = vector_function(lambda x, y: vector(x=y, y=mu*(1 - x*x)*y - x))
+compare('Van der Pol, mu = 1000, t = 200', van_der_pol, vector(x=2.0, y=0.0), 200, [
+    bdf2_integrator(0.01, 100),
+    rosenbrock_integrator(1, 1, rtol=1e-4, atol=1e-8),
+    dopri5_integrator(1, 1, rtol=1e-4, atol=1e-8, h=1e-6),
+])
@@ -0,0 +1,35 @@
+"""Ensemble statistics of SDEs with Euler–Maruyama and Milstein against the exact moments"""
+import math
+import time
+from diffeq import *
+
+# geometric Brownian motion dx = mu x dt + sigma x dW
+mu, sigma = 0.5, 0.4
+drift = vector_function(lambda x: vector(x=mu*x))
+diffusion = vector_function(lambda x: vector(x=sigma*x))
+paths = 10000
+print(f'Geometric Brownian motion, {paths} paths, t = 1')
+for solver in (euler_maruyama_integrator(diffusion, 0.01, 10, seed=0),
+               milstein_integrator(diffusion, 0.01, 10, seed=0)):
+    t = time.perf_counter()
+    mean, variance = system(drift, solver).run_statistics([vector(x=1.0)]*paths, 1.01)
+    t = time.perf_counter() - t
+    T = mean['time'][-1]
+    print(f'  {type(solver).__name__:<26} {t:6.2f}s  '
+          f'mean {mean["x"][-1]:.4f} (exact {math.exp(mu*T):.4f})  '
+          f'variance {variance["x"][-1]:.4f} (exact {math.exp(2*mu*T)*(math.exp(sigma**2*T) - 1):.4f})')
+
+# Ornstein–Uhlenbeck velocity driving a position, noise on one axis only
+theta, s = 2.0, 0.5
+ou = vector_function(lambda x, v: vector(x=v, v=-theta*v))
+noise = vector_function(lambda v: vector(v=s))
+mean, variance = system(ou, euler_maruyama_integrator(noise, 0.01, 10, seed=0)).run_statistics(
+    [vector(x=0.0, v=1.0)]*paths, 5)
+print(f'Ornstein–Uhlenbeck, {paths} paths, t = {mean["time"][-1]:g}')
+print(f'  stationary variance of v {variance["v"][-1]:.4f} (exact {s*s/(2*theta):.4f}), '
+      f'mean of x {mean["x"][-1]:.4f} (exact {(1 - math.exp(-theta*mean["time"][-1]))/theta:.4f})')
+
+# the same seed gives the same paths, member j of an ensemble always uses stream j
+a = system(ou, milstein_integrator(noise, 0.01, 10, seed=42)).run_ensemble([vector(x=0.0, v=1.0)]*3, 1)
+b = system(ou, milstein_integrator(noise, 0.01, 10, seed=42)).run_ensemble([vector(x=0.0, v=1.0)]*3, 1)
+print('reproducible:', all(list(p['v']) == list(q['v']) for p, q in zip(a, b)))
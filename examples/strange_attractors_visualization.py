@@ -18,11 +18,8 @@ lorenz_sys = system(
         z=x*y + c*z)
         ), solver
 )
-lorenz_trjs = []
-for _ in range(10):
-    lorenz_sys.state = vector(x=gauss(), y=gauss(), z=gauss())
-    results = lorenz_sys.run(10)
-    lorenz_trjs.append(results)
+lorenz_trjs = lorenz_sys.run_ensemble(
+    [vector(x=gauss(), y=gauss(), z=gauss()) for _ in range(10)], 10)
 out = interactive.generate_html(lorenz_trjs, ('x', 'y', 'z'), color=interactive.start_end_grad(
 ), title='Lorenz Attractor', path='output/lorenz.html')
 
@@ -36,11 +33,8 @@ rossler_sys = system(
         z=b + z*(x - c))
         ), solver
 )
-rossler_trjs = []
-for _ in range(10):
-    rossler_sys.state = vector(x=gauss(), y=gauss(), z=gauss())*3
-    results = rossler_sys.run(10)
-    rossler_trjs.append(results)
+rossler_trjs = rossler_sys.run_ensemble(
+    [vector(x=gauss(), y=gauss(), z=gauss())*3 for _ in range(10)], 10)
 out = interactive.generate_html(rossler_trjs, ('x', 'y', 'z'), color=interactive.start_end_grad(
 ), title='Rossler Attractor', path='output/rossler.html')
 
@@ -54,12 +48,8 @@ multiscroll_sys = system(
         z=x*y-b*z)
         ), solver
 )
-multiscroll_trjs = []
-for _ in range(10):
-    multiscroll_sys.state = vector(
-        x=gauss(), y=gauss(), z=gauss()) + vector(x=0.1, y=0.3, z=-0.6)
-    results = multiscroll_sys.run(10)
-    multiscroll_trjs.append(results)
+multiscroll_trjs = multiscroll_sys.run_ensemble(
+    [vector(x=gauss(), y=gauss(), z=gauss()) + vector(x=0.1, y=0.3, z=-0.6) for _ in range(10)], 10)
 out = interactive.generate_html(multiscroll_trjs, ('x', 'y', 'z'), color=interactive.start_end_grad(
 ), title='Lu Chen Attractor', path='output/Lu Chen.html')
 
@@ -72,11 +62,8 @@ trillium_sys = system(
                                               z=-d*z + x*y
                                               )), solver
 )
-trillium_trjs = []
-for _ in range(50):
-    trillium_sys.state = vector(x=gauss(), y=gauss(), z=gauss())*2
-    results = trillium_sys.run(10)
-    trillium_trjs.append(results)
+trillium_trjs = trillium_sys.run_ensemble(
+    [vector(x=gauss(), y=gauss(), z=gauss())*2 for _ in range(50)], 10)
 out = interactive.generate_html(trillium_trjs, ('x', 'y', 'z'), color=interactive.start_end_grad(
 ), title='Trillium Attractor', path='output/trillium.html')
 
@@ -90,13 +77,13 @@ tomas_sys = system(
         z=-a*z + b*symb.sin(x))
         ), solver
 )
-tomas_trjs = []
-for _ in range(10):
-    tomas_sys.state = 5*(vector(x=random(), y=random(), z=random())*2 - 1.0)
-    results = tomas_sys.run(100)
-    tomas_trjs.append(results)
+tomas_trjs = tomas_sys.run_ensemble(
+    [5*(vector(x=random(), y=random(), z=random())*2 - 1.0) for _ in range(10)], 100)
+report = {}
 out = interactive.generate_html(tomas_trjs, ('x', 'y', 'z'), color=interactive.start_end_grad(
-), title='Tomas Attractor', path='output/tomas.html')
+), title='Tomas Attractor', path='output/tomas.html', pixels=2000, report=report)
+print(f"Tomas Attractor: {report['vertices_before']} -> {report['vertices_after']} vertices "
+      f"({report['reduction']:.1f}x fewer)")
 
 
 # linear system
@@ -107,10 +94,7 @@ linear_sys = system(
         z=-0.3*z
         )), solver
 )
-linear_trjs = []
-for _ in range(50):
-    linear_sys.state = vector(x=gauss(), y=gauss(), z=gauss())*2
-    results = linear_sys.run(10)
-    linear_trjs.append(results)
+linear_trjs = linear_sys.run_ensemble(
+    [vector(x=gauss(), y=gauss(), z=gauss())*2 for _ in range(50)], 10)
 out = interactive.generate_html(linear_trjs, ('x', 'y', 'z'), color=interactive.start_end_grad(
 ), title='linear system', path='output/linear.html')
@@ -0,0 +1,40 @@
+"""Energy drift of rk4 against the symplectic leapfrog and Yoshida integrators on long runs"""
+import math
+import time
+import diffeq.utils.symbolic as symb
+from diffeq import *
+
+
+def compare(name, f, energy, initials, t_end, solvers):
+    print(name)
+    for solver in solvers:
+        sys = system(f, solver, initials)
+        t = time.perf_counter()
+        history = sys.run(t_end)
+        t = time.perf_counter() - t
+        axes = list(initials.keys())
+        e = [energy(**dict(zip(axes, s))) for s in zip(*(history[a] for a in axes))]
+        drift = max(abs(v - e[0]) for v in e)
+        print(f'  {type(solver).__name__:<22} {t:6.2f}s  max |E - E0| = {drift:.3e}  {sys.stats}')
+
+
+pendulum = vector_function(lambda q, p: vector(q=p, p=-symb.sin(q)), positions=['q'], momenta=['p'])
+compare('Pendulum, dt = 0.2, t = 10000', pendulum,
+        lambda q, p: p*p/2 - math.cos(q), vector(q=2.5, p=0.0), 10000, [
+            rk4_integrator(0.2, 5),
+            leapfrog_integrator(0.2, 5),
+            yoshida4_integrator(0.2, 5),
+        ])
+
+# planar Kepler problem, eccentricity 0.5
+kepler = vector_function(lambda x, y, u, v: vector(
+    x=u, y=v,
+    u=-x*(x*x + y*y)**-1.5,
+    v=-y*(x*x + y*y)**-1.5)).partition(['x', 'y'], ['u', 'v'])
+compare('Kepler, e = 0.5, dt = 0.01, t = 2000', kepler,
+        lambda x, y, u, v: (u*u + v*v)/2 - 1/math.sqrt(x*x + y*y),
+        vector(x=0.5, y=0.0, u=0.0, v=math.sqrt(3)), 2000, [
+            rk4_integrator(0.01, 100),
+            leapfrog_integrator(0.01, 100),
+            yoshida4_integrator(0.01, 100),
+        ])
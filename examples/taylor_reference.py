@@ -0,0 +1,31 @@
+"""High-order Taylor integration of Lorenz as a reference trajectory, against small-step rk4 and dopri5"""
+import time
+from diffeq import *
+
+lorenz = vector_function(lambda x, y, z: vector(x=10*(y - x), y=x*(28 - z) - y, z=x*y - 8/3*z))
+print(lorenz.get_taylor_source(('x', 'y', 'z')))
+
+initials = vector(x=1.0, y=1.0, z=1.0)
+t_end = 20.5  # records up to t = 20
+
+
+def run(solver):
+    sys = system(lorenz, solver, initials)
+    t = time.perf_counter()
+    sys.run(t_end)
+    return sys.state, time.perf_counter() - t, sys.stats
+
+
+reference, t, _ = run(taylor_integrator(0.005, 200, order=30))
+print(f'reference: order 30, dt = 0.005, {t:.2f}s')
+for solver in (taylor_integrator(0.02, 50, order=12),
+               taylor_integrator(0.01, 100, order=20),
+               taylor_integrator(1, 1, order=20, tol=1e-16),
+               rk4_integrator(0.001, 1000),
+               rk4_integrator(0.0001, 10000),
+               dopri5_integrator(1, 1, rtol=1e-12, atol=1e-12, h=1e-3)):
+    state, t, stats = run(solver)
+    error = max(abs(state[a] - reference[a]) for a in 'xyz')
+    label = f'{type(solver).__name__} order {solver.order}' if isinstance(solver, taylor_integrator) \
+        else type(solver).__name__
+    print(f'  {label:<28} dt = {solver.dt:<7g} error at t = 20: {error:.2e}  {t:6.2f}s  {stats}')
@@ -0,0 +1,29 @@
+import math
+
+import pytest
+
+import diffeq.utils.dual as dual
+import diffeq.utils.symbolic as symb
+from diffeq import *
+from diffeq.utils.calculus import jacobian
+
+
+def test_dual_jacobian_through_math_functions():
+    f = vector_function(lambda x, y: vector(x=symb.sin(x)*y, y=symb.exp(y)))
+    J = jacobian(f, vector(x=0.5, y=2.0), method='dual')
+    assert J['dx_dx'] == pytest.approx(2*math.cos(0.5), abs=1e-15)
+    assert J['dy_dy'] == pytest.approx(math.exp(2.0), abs=1e-12)
+
+
+def test_dual_parameter_override():
+    f = vector_function(lambda x, a: vector(x=symb.cos(a*x)), parameters={'a': 1.0})
+    out = f(vector(x=2.0), a=dual.dual(3.0, 1.0))['x']
+    assert dual.tangent(out) == pytest.approx(-2*math.sin(6.0), abs=1e-15)
+
+
+def test_type_errors_are_not_retried_on_duals():
+    f = vector_function(lambda x, y: vector(x=symb.sin(x) + y))
+    with pytest.raises(TypeError):
+        f(vector(x=dual.dual(1.0, 1.0), y='y'))
+    with pytest.raises(TypeError):
+        f(vector(x=1.0, y='y'))
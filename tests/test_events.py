@@ -0,0 +1,28 @@
+import pytest
+
+from diffeq import *
+from diffeq.SDE import event
+
+
+def drift():
+    return vector_function(lambda x: vector(x=1.0))
+
+
+def test_crossings_after_t_end_are_dropped():
+    sys = system(drift(), rk4_integrator(0.3, 1), vector(x=0.0))
+    found = sys.find_events([event(lambda x: x - 1.1, name='late'), event(lambda x: x - 0.5)], 1.0)
+    assert [name for name, t, state in found] == ['event1']
+    assert found[0][1] == pytest.approx(0.5)
+    assert sys.state['x'] == pytest.approx(1.2)
+
+
+def test_terminal_event_after_t_end_does_not_stop_the_run():
+    sys = system(drift(), rk4_integrator(0.3, 1), vector(x=0.0))
+    assert sys.find_events([event(lambda x: x - 1.1, terminal=True)], 1.0) == []
+    assert sys.state['x'] == pytest.approx(1.2)
+
+
+def test_event_on_a_missing_axis_raises():
+    sys = system(drift(), rk4_integrator(0.1, 1), vector(x=0.0))
+    with pytest.raises(ValueError, match='y'):
+        sys.find_events([event(lambda x, y: x - y)], 1.0)
@@ -0,0 +1,38 @@
+import base64
+import re
+import struct
+
+from diffeq import vector
+from diffeq.plotting import interactive
+
+
+def payloads(html):
+    return re.findall(r'"enc": "(\w+)", "data": "([^"]*)"', html)
+
+
+def trajectory(x):
+    return vector(x=list(x), y=[0.0]*len(x), z=[0.0]*len(x), time=[float(i) for i in range(len(x))])
+
+
+def test_f16_keeps_values_in_range(tmp_path):
+    html = interactive.generate_html([trajectory([0.0, 1.5])], ('x', 'y', 'z'), path=str(tmp_path/'a.html'),
+                                     encoding='f16')
+    assert [enc for enc, _ in payloads(html)] == ['f16']
+
+
+def test_f16_out_of_range_values_are_embedded_as_f32(tmp_path):
+    html = interactive.generate_html([trajectory([0.0, 1e5]), trajectory([-7e4, 2.0]), trajectory([0.0, 1.0])],
+                                     ('x', 'y', 'z'), path=str(tmp_path/'b.html'), encoding='f16')
+    found = payloads(html)
+    assert [enc for enc, _ in found] == ['f32', 'f32', 'f16']
+    data = base64.b64decode(found[0][1])
+    values = struct.unpack(f'<{len(data)//4}f', data)
+    assert values[7] == 1e5
+
+
+def test_report_is_filled_when_simplifying(tmp_path):
+    line = trajectory([0.1*i for i in range(100)])
+    report = {}
+    interactive.generate_html([line], ('x', 'y', 'z'), path=str(tmp_path/'c.html'), tolerance=1e-6, report=report)
+    assert report == {'vertices_before': 100, 'vertices_after': 2, 'reduction': 50.0}
+    assert not hasattr(interactive, 'last_report')
@@ -0,0 +1,40 @@
+import math
+
+from diffeq import *
+
+
+def decay():
+    return vector_function(lambda x, a: vector(x=-a*x), parameters={'a': 1.0})
+
+
+def test_systems_sharing_a_function_keep_their_own_parameters():
+    f = decay()
+    s1 = system(f, rk4_integrator(0.01), vector(x=1.0), parameters={'a': 2.0})
+    s2 = system(f, rk4_integrator(0.01), vector(x=1.0))
+    s1.update()
+    s2.update()
+    assert math.isclose(s1.state['x'], math.exp(-2.0), rel_tol=1e-6)
+    assert math.isclose(s2.state['x'], math.exp(-1.0), rel_tol=1e-6)
+    assert f(vector(x=1.0))['x'] == -1.0
+    assert f.parameter_values == [1.0]
+
+
+def test_system_bind_changes_only_that_system():
+    f = decay()
+    s1 = system(f, rk4_integrator(0.01), vector(x=1.0))
+    s2 = system(f, rk4_integrator(0.01), vector(x=1.0))
+    s1.bind(a=3.0)
+    s1.update()
+    s2.update()
+    assert math.isclose(s1.state['x'], math.exp(-3.0), rel_tol=1e-6)
+    assert math.isclose(s2.state['x'], math.exp(-1.0), rel_tol=1e-6)
+    assert s1.parameters == {'a': 3.0} and s2.parameters == {'a': 1.0}
+
+
+def test_implicit_and_taylor_integrators_use_the_system_parameters():
+    for solver in (backward_euler_integrator(0.001), taylor_integrator(0.1, 10)):
+        f = decay()
+        s = system(f, solver, vector(x=1.0), parameters={'a': 2.0})
+        system(f, rk4_integrator(0.01), vector(x=1.0)).update()
+        s.update()
+        assert math.isclose(s.state['x'], math.exp(-2.0), rel_tol=1e-2)